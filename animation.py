@@ -0,0 +1,262 @@
+# Animation clips + playback timelines.
+#
+# A Clip is the shared, read-only bit (frame names + how to play them). It's
+# resolved once per (character, animation) and handed out from a process-wide
+# registry, so switching animations never goes near the image loader again.
+# An Animation is just a clip plus the tick it started on – each character keeps
+# its own and restarts it instead of building a new one every time.
+#
+# Only one facing of a directional clip is stored on disk (the _right one, same
+# as the source GIFs). Asking for run_left hands out knight_run_left_<n> names
+# anyway; mirror_source() tells the renderer which stored frame to flip.
+#
+# Frames are stored cropped to their opaque pixels (unfurl_gif.py);
+# trim_offset() says where the crop sat in the full frame so it's drawn in the
+# same spot.
+import json
+import os
+
+import eventlog
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+
+assets_log = eventlog.channel("assets")
+
+# "<character>_<animation>" -> number of contiguous frames found on disk
+_frame_counts = None
+# (character, animation) -> tuple of frame names
+_frame_cache = {}
+# (character, animation, tick_delay, retain_last_frame, loop, priority) -> Clip
+_clip_cache = {}
+# stored frame name -> [x, y, full width, full height], from images/frames.json
+_trim_offsets = None
+
+
+def _scan_images(images_dir=IMAGES_DIR):
+    # One directory listing instead of poking images.<name> frame by frame.
+    # pgzero image names are the lowercase file names without the extension.
+    found = {}
+    for filename in os.listdir(images_dir):
+        name, ext = os.path.splitext(filename)
+        if ext.lower() != ".png":
+            continue
+        base, _, index = name.rpartition("_")
+        if base and index.isdigit():
+            found.setdefault(base.lower(), set()).add(int(index))
+    counts = {}
+    for base, indices in found.items():
+        count = 0
+        while count in indices:  # same rule as before: stop at the first gap
+            count += 1
+        counts[base] = count
+    return counts
+
+
+def _counts():
+    global _frame_counts
+    if _frame_counts is None:
+        _frame_counts = _scan_images()
+    return _frame_counts
+
+
+def _opposite(base):
+    # "knight_run_left" <-> "knight_run_right"; None for non-directional names
+    if base.endswith("_left"):
+        return base[: -len("_left")] + "_right"
+    if base.endswith("_right"):
+        return base[: -len("_right")] + "_left"
+    return None
+
+
+def mirror_source(frame_name):
+    # Name of the stored frame to flip horizontally for frame_name, or None if
+    # frame_name is on disk itself (or isn't a directional frame at all).
+    base, _, index = frame_name.rpartition("_")
+    if not index.isdigit():
+        return None
+    counts = _counts()
+    index = int(index)
+    if counts.get(base, 0) > index:
+        return None
+    other = _opposite(base)
+    if other is not None and counts.get(other, 0) > index:
+        return f"{other}_{index}"
+    return None
+
+
+def trim_offset(frame_name, images_dir=IMAGES_DIR):
+    # (x, y, full width, full height) of a stored frame that was trimmed, or None
+    # if it's stored at full size.
+    global _trim_offsets
+    if _trim_offsets is None:
+        try:
+            with open(os.path.join(images_dir, "frames.json")) as f:
+                _trim_offsets = json.load(f)["frames"]
+        except (OSError, ValueError, KeyError):
+            _trim_offsets = {}
+    return _trim_offsets.get(frame_name)
+
+
+def frame_bases(mirrored=True):
+    # Every "<character>_<animation>" there are frames for – the stored ones plus
+    # (unless mirrored is False) the mirrored facing of the directional ones.
+    counts = _counts()
+    bases = set(counts)
+    if mirrored:
+        for base in counts:
+            other = _opposite(base)
+            if other is not None:
+                bases.add(other)
+    return sorted(bases)
+
+
+def resolve_frames(character_name, animation_name):
+    key = (character_name, animation_name)
+    frames = _frame_cache.get(key)
+    if frames is None:
+        counts = _counts()
+        base = f"{character_name}_{animation_name}"
+        count = counts.get(base, 0)
+        if not count and _opposite(base) is not None:
+            count = counts.get(_opposite(base), 0)  # mirrored at draw time
+        frames = tuple(f"{base}_{i}" for i in range(count))
+        _frame_cache[key] = frames
+        if not frames:
+            assets_log.warning("No frames found for {base}. (ugh!)", base=base)
+        elif assets_log.verbose:
+            assets_log.debug("Loaded {count} frames for {base}.", count=len(frames), base=base)
+    return frames
+
+
+class Clip:
+    __slots__ = (
+        "character_name",
+        "animation_name",
+        "frames",
+        "tick_delay",
+        "retain_last_frame",
+        "loop",
+        "priority",
+    )
+
+    def __init__(
+        self,
+        character_name,
+        animation_name,
+        frames,
+        tick_delay,
+        retain_last_frame,
+        loop=False,
+        priority=5,
+    ):
+        self.character_name = character_name
+        self.animation_name = animation_name
+        self.frames = tuple(frames)
+        self.tick_delay = tick_delay
+        self.retain_last_frame = retain_last_frame
+        self.loop = loop
+        self.priority = priority
+
+
+def get_clip(
+    character_name,
+    animation_name,
+    tick_delay,
+    retain_last_frame,
+    loop=False,
+    priority=5,
+    fallback_frames=(),
+):
+    key = (character_name, animation_name, tick_delay, retain_last_frame, loop, priority)
+    clip = _clip_cache.get(key)
+    if clip is None:
+        frames = resolve_frames(character_name, animation_name) or fallback_frames
+        clip = Clip(
+            character_name,
+            animation_name,
+            frames,
+            tick_delay,
+            retain_last_frame,
+            loop=loop,
+            priority=priority,
+        )
+        _clip_cache[key] = clip
+    return clip
+
+
+def clear_clip_cache():
+    # Only needed if the images/ folder changes under a running process.
+    global _frame_counts, _trim_offsets
+    _frame_counts = None
+    _trim_offsets = None
+    _frame_cache.clear()
+    _clip_cache.clear()
+
+
+# Playback timeline – the only per-character animation state. Nothing here
+# ticks: the frame is worked out from the clip and the tick it started on
+# whenever somebody asks, so an idle or looping character costs nothing until
+# it's drawn. A clip shows its first frame on the start tick itself (same as
+# the old per-tick cursor did after its first update).
+class Animation:
+    __slots__ = ("clip", "start", "plays")
+
+    def __init__(self, clip=None, start=0):
+        self.clip = clip
+        self.start = start
+        self.plays = 0  # bumped by every play(), so a stale finish can tell it's stale
+
+    def play(self, clip, start=0):
+        # Restart on a (possibly different) clip without allocating anything.
+        self.clip = clip
+        self.start = start
+        self.plays += 1
+        return self
+
+    @property
+    def character_name(self):
+        return self.clip.character_name
+
+    @property
+    def animation_name(self):
+        return self.clip.animation_name
+
+    @property
+    def frames(self):
+        return self.clip.frames
+
+    @property
+    def tick_delay(self):
+        return self.clip.tick_delay
+
+    @property
+    def retain_last_frame(self):
+        return self.clip.retain_last_frame
+
+    @property
+    def loop(self):
+        return self.clip.loop
+
+    @property
+    def priority(self):
+        return self.clip.priority
+
+    @property
+    def end(self):
+        # Tick a one-shot clip finishes on (its last frame has had its full
+        # tick_delay) – None for loops and clips without frames, which never do.
+        clip = self.clip
+        if clip.loop or not clip.frames:
+            return None
+        return self.start + len(clip.frames) * clip.tick_delay - 1
+
+    def frame_at(self, tick):
+        # Frame name shown on tick, or None if the clip has no frames.
+        clip = self.clip
+        frames = clip.frames
+        if not frames:
+            return None
+        index = (tick - self.start + 1) // clip.tick_delay
+        if clip.loop:
+            return frames[index % len(frames)]
+        return frames[min(index, len(frames) - 1)]
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# Texture atlas: pack every sprite in images/ into a few big pages plus a JSON
+# index, and slice them back into sub-surfaces at startup.
+#
+#     python atlas.py                      # images/ -> atlas/atlas_<n>.png + atlas/atlas.json
+#
+# Re-run it after unfurling new frames. The game uses the atlas when it's there
+# and falls back to pgzero's one-file-per-frame loading for anything it lacks.
+import argparse
+import json
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+IMAGES_DIR = os.path.join(HERE, "images")
+ATLAS_DIR = os.path.join(HERE, "atlas")
+INDEX_NAME = "atlas.json"
+
+
+def shelf_pack(sizes, page_size, padding=1):
+    """
+    Packs rectangles into pages using simple shelves (rows), tallest first.
+    sizes is a dict of name -> (w, h). Returns name -> (page, x, y, w, h).
+    """
+    placements = {}
+    page = 0
+    x = y = shelf_height = 0
+    order = sorted(sizes, key=lambda name: (-sizes[name][1], -sizes[name][0], name))
+    for name in order:
+        w, h = sizes[name]
+        if w > page_size or h > page_size:
+            raise ValueError(f"{name} ({w}x{h}) does not fit on a {page_size}px page")
+        if x + w > page_size:  # next shelf
+            x = 0
+            y += shelf_height + padding
+            shelf_height = 0
+        if y + h > page_size:  # next page
+            page += 1
+            x = y = shelf_height = 0
+        placements[name] = (page, x, y, w, h)
+        x += w + padding
+        shelf_height = max(shelf_height, h)
+    return placements
+
+
+def pack_atlas(source_dir=IMAGES_DIR, target_dir=ATLAS_DIR, page_size=1024, max_sprite=256):
+    """
+    Packs every PNG in source_dir that is at most max_sprite pixels on each side
+    (so the background stays a separate image) into page_size x page_size atlas
+    pages, and writes the pages plus an index mapping image names to
+    [page, x, y, w, h].
+    """
+    from PIL import Image
+
+    os.makedirs(target_dir, exist_ok=True)
+    sprites = {}
+    for filename in sorted(os.listdir(source_dir)):
+        name, ext = os.path.splitext(filename)
+        if ext.lower() != ".png":
+            continue
+        with Image.open(os.path.join(source_dir, filename)) as im:
+            if im.width > max_sprite or im.height > max_sprite:
+                continue
+            sprites[name.lower()] = im.convert("RGBA")
+
+    placements = shelf_pack({name: im.size for name, im in sprites.items()}, page_size)
+    page_count = max((p[0] for p in placements.values()), default=-1) + 1
+    pages = [Image.new("RGBA", (page_size, page_size), (0, 0, 0, 0)) for _ in range(page_count)]
+    for name, (page, x, y, w, h) in placements.items():
+        pages[page].paste(sprites[name], (x, y))
+
+    # Shrink the last page to what's actually used.
+    page_files = []
+    for i, page in enumerate(pages):
+        if i == page_count - 1:
+            used_w = max(x + w for p, x, y, w, h in placements.values() if p == i)
+            used_h = max(y + h for p, x, y, w, h in placements.values() if p == i)
+            page = page.crop((0, 0, used_w, used_h))
+        page_file = f"atlas_{i}.png"
+        page.save(os.path.join(target_dir, page_file), format="PNG", optimize=True)
+        page_files.append(page_file)
+
+    # Drop pages left over from a bigger previous pack.
+    for filename in os.listdir(target_dir):
+        if filename.startswith("atlas_") and filename.endswith(".png") and filename not in page_files:
+            os.remove(os.path.join(target_dir, filename))
+
+    index = {
+        "pages": page_files,
+        "frames": {name: list(placements[name]) for name in sorted(placements)},
+    }
+    with open(os.path.join(target_dir, INDEX_NAME), "w") as f:
+        json.dump(index, f, indent=1)
+    print(f"Packed {len(placements)} sprites into {len(page_files)} page(s) in {target_dir}")
+    return index
+
+
+def read_index(atlas_dir=ATLAS_DIR):
+    path = os.path.join(atlas_dir, INDEX_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_atlas(atlas_dir=ATLAS_DIR):
+    """
+    Loads the atlas pages (one file read + decode each) and returns a dict of
+    image name -> pygame sub-surface sharing the page's pixels. Needs a display
+    mode to be set already (convert_alpha). Returns {} if there's no atlas.
+    """
+    import pygame
+
+    index = read_index(atlas_dir)
+    if index is None:
+        return {}
+    pages = [
+        pygame.image.load(os.path.join(atlas_dir, page_file)).convert_alpha()
+        for page_file in index["pages"]
+    ]
+    return {
+        name: pages[page].subsurface((x, y, w, h))
+        for name, (page, x, y, w, h) in index["frames"].items()
+    }
+
+
+def install_atlas(image_loader, atlas_dir=ATLAS_DIR):
+    # Seed pgzero's image cache so images.load(name) (sprites.py) hits the atlas
+    # instead of opening the loose PNG.
+    frames = load_atlas(atlas_dir)
+    for name, surface in frames.items():
+        image_loader.cache[image_loader.cache_key(name, (), {})] = surface
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pack the sprite frames in images/ into atlas pages plus a JSON index."
+    )
+    parser.add_argument("--source", default=IMAGES_DIR, help="Directory with the PNG frames.")
+    parser.add_argument("--target", default=ATLAS_DIR, help="Where to write the atlas.")
+    parser.add_argument("--page-size", type=int, default=1024, help="Atlas page size in pixels.")
+    parser.add_argument(
+        "--max-sprite",
+        type=int,
+        default=256,
+        help="Images bigger than this on either side (the background) are left out.",
+    )
+    args = parser.parse_args()
+    pack_atlas(args.source, args.target, args.page_size, args.max_sprite)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# Sound effects through a fixed pool of mixer channels.
+#
+# Every effect handle is resolved (and decoded by pgzero's loader) once, up
+# front. Effects only ever play on our own reserved channels, so the soundtrack
+# (plain Sound.play()) never fights them for one. Per sound there's a cap on how
+# many copies can ring at once: a second skeleton_attack in the same instant
+# just makes the first one louder instead of stacking another voice, and past
+# the cap the oldest copy is restarted. When every channel is busy the
+# lowest-priority (then oldest) voice is stolen – or the new sound is dropped if
+# everything playing matters more.
+#
+# sim.py only sees play()/stop()/playing()/handle(); headless runs pass no
+# manager at all.
+import pygame
+
+# Higher wins when channels run out. The hero is always heard over the horde.
+SOUND_PRIORITY = {
+    "knight_death": 10,
+    "knight_attack1": 8,
+    "knight_dash": 8,
+    "knight_run": 4,
+    "skeleton_death": 6,
+    "skeleton_attack": 5,
+}
+DEFAULT_PRIORITY = 5
+
+# Max copies of one sound playing at the same time.
+VOICE_LIMITS = {
+    "knight_run": 1,
+    "skeleton_attack": 2,
+    "skeleton_death": 2,
+}
+DEFAULT_LIMIT = 3
+
+COLLAPSE_MS = 60  # requests this close together share one voice
+COLLAPSE_GAIN = 0.15
+# The horde's sounds are the ones that collapse. They start below full volume
+# so a shared voice has room to get louder (a channel can't go past 1.0);
+# everything else plays at full volume.
+COLLAPSE_VOLUME = {
+    "skeleton_attack": 0.6,
+    "skeleton_death": 0.6,
+}
+
+
+class Voice:
+    __slots__ = ("name", "slot", "priority", "started", "users", "volume")
+
+    def __init__(self, name, slot, priority, started):
+        self.name = name
+        self.slot = slot
+        self.priority = priority
+        self.started = started
+        self.users = 1  # owners that still want it (see stop())
+        self.volume = COLLAPSE_VOLUME.get(name, 1.0)
+
+
+class VoiceManager:
+    def __init__(self, loader, channels=12, limits=VOICE_LIMITS, priorities=SOUND_PRIORITY, clock=None):
+        self.loader = loader
+        self.limits = limits
+        self.priorities = priorities
+        self.clock = clock or pygame.time.get_ticks
+        self._handles = {}  # name -> Sound or None
+        if pygame.mixer.get_init():
+            if pygame.mixer.get_num_channels() < channels + 2:
+                pygame.mixer.set_num_channels(channels + 2)  # leave some for the soundtrack
+            pygame.mixer.set_reserved(channels)
+            self._channels = [pygame.mixer.Channel(i) for i in range(channels)]
+        else:
+            self._channels = []  # no audio device – play() just returns None
+        self._voices = [None] * len(self._channels)
+        # what happened to play() requests, for the curious
+        self.started = self.collapsed = self.stolen = self.dropped = 0
+
+    def handle(self, name):
+        try:
+            return self._handles[name]
+        except KeyError:
+            sound = self._handles[name] = getattr(self.loader, name, None)
+            return sound
+
+    def play(self, name, loops=0):
+        """
+        Starts (or joins) a voice for the named sound and returns it, or None if
+        there's no such sound or it lost the fight for a channel. Hand the
+        voice back to stop() when done with it.
+        """
+        sound = self.handle(name)
+        if sound is None or not self._channels:
+            return None
+        now = self.clock()
+        voices = self._voices
+        for slot, voice in enumerate(voices):
+            if voice is not None and not self._channels[slot].get_busy():
+                voices[slot] = None  # finished on its own
+
+        same = [voice for voice in voices if voice is not None and voice.name == name]
+        if same:
+            newest = max(same, key=lambda voice: voice.started)
+            if not loops and now - newest.started <= COLLAPSE_MS:
+                newest.users += 1
+                newest.volume = min(1.0, newest.volume + COLLAPSE_GAIN)
+                self._channels[newest.slot].set_volume(newest.volume)
+                self.collapsed += 1
+                return newest
+
+        priority = self.priorities.get(name, DEFAULT_PRIORITY)
+        if len(same) >= self.limits.get(name, DEFAULT_LIMIT):
+            slot = min(same, key=lambda voice: voice.started).slot  # oldest copy gives way
+            self.stolen += 1
+        elif None in voices:
+            slot = voices.index(None)
+        else:
+            victim = min(voices, key=lambda voice: (voice.priority, voice.started))
+            if victim.priority > priority:
+                self.dropped += 1
+                return None
+            slot = victim.slot
+            self.stolen += 1
+
+        voice = voices[slot] = Voice(name, slot, priority, now)
+        channel = self._channels[slot]
+        channel.play(sound, loops=loops)
+        channel.set_volume(voice.volume)
+        self.started += 1
+        return voice
+
+    def playing(self, voice):
+        return (
+            voice is not None
+            and self._voices[voice.slot] is voice
+            and self._channels[voice.slot].get_busy()
+        )
+
+    def stop(self, voice):
+        # A collapsed voice keeps ringing until its last owner lets go.
+        if voice is None:
+            return
+        voice.users -= 1
+        if voice.users <= 0 and self._voices[voice.slot] is voice:
+            self._channels[voice.slot].stop()
+            self._voices[voice.slot] = None
+
+    def active(self):
+        return sum(1 for voice in self._voices if voice is not None)
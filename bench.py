@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# Benchmarks for the hot paths, written out as JSON so numbers can be compared
+# between builds/machines over time.
+#
+#     python bench.py                         # everything, JSON to stdout
+#     python bench.py --output bench.json     # ...or to a file
+#     python bench.py --quick --only ticks    # fewer sizes/repeats, one group
+#
+# Groups: ticks (World.step throughput per wave size), animation (timelines),
+# attack (hero target search vs N skeletons), draw (one frame onto an offscreen
+# surface), startup (fresh interpreter to first frame) and memory (bytes per
+# Enemy). draw/startup need pygame + pgzero, numpy rows need numpy – whatever
+# is missing is reported as skipped instead of failing the run.
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+WAVES = (1, 5, 10, 25, 50, 100, 200)
+QUICK_WAVES = (1, 10, 50, 200)
+
+
+def _quiet():
+    # No log events (eventlog.py) during the timings.
+    import eventlog
+
+    return eventlog.muted()
+
+
+def _rate(fn, min_time):
+    # Calls fn() until min_time has passed; returns (calls per second, calls).
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+    return calls / elapsed, calls
+
+
+def _backends():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return ("objects",)
+    return ("objects", "numpy")
+
+
+def _full_world(wave, backend="objects", **options):
+    from sim import World
+
+    # Whole wave at once – the staggered spawner would bench a half-empty world.
+    return World(seed=1, wave_count=wave, enemy_backend=backend, spawn_per_tick=10**9, **options)
+
+
+def bench_ticks(waves, min_time):
+    from sim import InputState
+
+    results = []
+    for backend in _backends():
+        for wave in waves:
+            with _quiet():
+                world = _full_world(wave, backend)
+                # Idle hero: the skeletons walk over and keep swinging, but
+                # nobody dies, so the wave size stays put for the whole run.
+                world.hero.health = 10**6
+                inputs = InputState()
+                rate, ticks = _rate(lambda: world.step(inputs), min_time)
+            results.append(
+                {
+                    "backend": backend,
+                    "wave": wave,
+                    "enemies": len(world.enemies),
+                    "ticks_per_s": rate,
+                    "us_per_tick": 1e6 / rate,
+                    "ticks": ticks,
+                }
+            )
+    return results
+
+
+def bench_animation(min_time):
+    from animation import Animation, get_clip
+    from sim import Enemy
+
+    tick = 12345  # any tick will do, frames are computed rather than stepped
+    with _quiet():
+        clip = get_clip("skeleton", "run_right", 3, False, loop=True, priority=5)
+        new_rate, _ = _rate(lambda: Animation(clip), min_time)
+        timeline = Animation(clip)
+        frame_rate, _ = _rate(lambda: timeline.frame_at(tick), min_time)
+        enemy = Enemy("skeleton", pos=(300, 278))
+        idle_rate, _ = _rate(lambda: enemy.frame_at(tick), min_time)
+        enemy.run()
+        run_rate, _ = _rate(lambda: enemy.frame_at(tick), min_time)
+        switch_rate, _ = _rate(lambda: enemy.set_animation(clip), min_time)
+    return {
+        "animation_new_ns": 1e9 / new_rate,
+        "animation_frame_at_ns": 1e9 / frame_rate,
+        "frame_at_idle_ns": 1e9 / idle_rate,
+        "frame_at_run_ns": 1e9 / run_rate,
+        "set_animation_ns": 1e9 / switch_rate,
+    }
+
+
+def bench_attack(sizes, min_time):
+    results = []
+    for backend in _backends():
+        for n in sizes:
+            with _quiet():
+                world = _full_world(max(n // 2, 1), backend)
+                hero_x = world.hero.actor.x
+                # Same lookup Hero.attack does (reach 50, facing right), both
+                # when something is in range and when the nearest is far off.
+                hit_rate, _ = _rate(lambda: world.nearest_enemy(hero_x, "right", reach=50), min_time)
+                any_rate, _ = _rate(lambda: world.nearest_enemy(hero_x), min_time)
+            results.append(
+                {
+                    "backend": backend,
+                    "enemies": len(world.enemies),
+                    "attack_search_us": 1e6 / hit_rate,
+                    "nearest_any_us": 1e6 / any_rate,
+                }
+            )
+    return results
+
+
+def _pgzero_setup():
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")  # stdout is our JSON
+    import pygame
+    from pgzero import loaders
+
+    from sim import HEIGHT, WIDTH
+
+    pygame.display.init()
+    pygame.display.set_mode((WIDTH, HEIGHT))
+    loaders.set_root(HERE)
+    return pygame, loaders
+
+
+def bench_draw(waves, min_time):
+    try:
+        pygame, loaders = _pgzero_setup()
+    except ImportError as e:
+        return {"skipped": str(e)}
+    from atlas import install_atlas
+    from hud import Hud
+    from render import DirtyRenderer
+    from sim import HEIGHT, MAX_HERO_HEALTH, WIDTH, InputState
+    from sprites import sprite_layers
+
+    install_atlas(loaders.images)
+    target = pygame.Surface((WIDTH, HEIGHT))  # offscreen, nothing is presented
+    background = loaders.images.load("background")
+    results = []
+    for wave in waves:
+        for mode in ("full", "dirty"):
+            with _quiet():
+                # a fresh world (same seed) per renderer, so both time the same frames
+                world = _full_world(wave)
+                world.hero.health = 10**6
+                hud = Hud(WIDTH, MAX_HERO_HEALTH)
+                inputs = InputState()
+            renderer = DirtyRenderer(background, enabled=mode == "dirty")
+
+            def frame():
+                # What game.draw() does each frame (minus the F3 overlay).
+                layers = sprite_layers(world.sprites())
+                layers.extend(hud.layers(world.hero, world.wave_count, target.get_rect()))
+                renderer.render(target, layers)
+
+            with _quiet():
+                # Step between frames so the sprites actually change.
+                rate, _ = _rate(lambda: (world.step(inputs), frame()), min_time)
+                step_rate, _ = _rate(lambda: world.step(inputs), min_time)
+            results.append(
+                {
+                    "wave": wave,
+                    "enemies": len(world.enemies),
+                    "renderer": mode,
+                    "draw_us": 1e6 / rate - 1e6 / step_rate,
+                    "frame_us": 1e6 / rate,
+                }
+            )
+    return results
+
+
+def _startup_child():
+    # Runs in a fresh interpreter: load game.py like `pgzrun game.py` would,
+    # draw one frame, and leave.
+    start = time.perf_counter()
+    pygame, _ = _pgzero_setup()
+    import types
+
+    from pgzero.game import PGZeroGame
+    from pgzero.runner import prepare_mod
+
+    path = os.path.join(HERE, "game.py")
+    sys._pgzrun = True  # makes the pgzrun.go() at the bottom of game.py a no-op
+    mod = types.ModuleType("game")
+    mod.__file__ = path
+    sys.modules["game"] = mod
+    prepare_mod(mod)
+    with _quiet():
+        with open(path) as f:
+            exec(compile(f.read(), path, "exec"), mod.__dict__)
+        game = PGZeroGame(mod)
+        game.reinit_screen()
+        mod.draw()
+        pygame.display.flip()
+    print(json.dumps({"in_process_s": time.perf_counter() - start}))
+
+
+def bench_startup(repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--startup-child"],
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+        )
+        wall = time.perf_counter() - start
+        if proc.returncode != 0:
+            return {"skipped": proc.stderr.strip().splitlines()[-1] if proc.stderr else "failed"}
+        child = json.loads(proc.stdout.strip().splitlines()[-1])
+        samples.append({"to_first_frame_s": wall, "in_process_s": child["in_process_s"]})
+    best = min(samples, key=lambda s: s["to_first_frame_s"])
+    return {"best": best, "samples": samples}
+
+
+def _allocated(make):
+    # Bytes still allocated after make() – and what it made, to keep it alive.
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    made = make()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, made
+
+
+def bench_memory(counts):
+    results = []
+    for backend in _backends():
+        with _quiet():
+            _full_world(1, backend)  # imports and clip caches, so they don't count
+            # wave 0 has no skeletons: the hero, World and backend's fixed cost
+            baseline, _ = _allocated(lambda: _full_world(0, backend))
+        for n in counts:
+            with _quiet():
+                allocated, world = _allocated(lambda: _full_world(max(n // 2, 1), backend))
+            enemies = len(world.enemies)
+            results.append(
+                {
+                    "backend": backend,
+                    "enemies": enemies,
+                    "bytes_per_enemy": (allocated - baseline) / enemies,
+                    "world_bytes": baseline,
+                }
+            )
+    return results
+
+
+GROUPS = ("ticks", "animation", "attack", "draw", "startup", "memory")
+
+
+def run(groups, quick=False):
+    min_time = 0.1 if quick else 0.5
+    waves = QUICK_WAVES if quick else WAVES
+    sizes = [2 * wave for wave in waves]
+    results = {}
+    for group in groups:
+        start = time.perf_counter()
+        if group == "ticks":
+            results[group] = bench_ticks(waves, min_time)
+        elif group == "animation":
+            results[group] = bench_animation(min_time)
+        elif group == "attack":
+            results[group] = bench_attack(sizes, min_time)
+        elif group == "draw":
+            results[group] = bench_draw(waves, min_time)
+        elif group == "startup":
+            results[group] = bench_startup(2 if quick else 5)
+        elif group == "memory":
+            results[group] = bench_memory(sizes)
+        print(f"{group:<10} {time.perf_counter() - start:6.1f}s", file=sys.stderr)
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths and write JSON.")
+    parser.add_argument("--output", metavar="PATH", help="Write the JSON here instead of stdout.")
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=GROUPS,
+        help="Run just this group (repeatable). Default: all of them.",
+    )
+    parser.add_argument("--quick", action="store_true", help="Fewer sizes and shorter runs.")
+    parser.add_argument("--startup-child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.startup_child:
+        _startup_child()
+        return
+
+    sys.path.insert(0, HERE)
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "quick": args.quick,
+        },
+        "results": run(args.only or GROUPS, quick=args.quick),
+    }
+    text = json.dumps(report, indent=1)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
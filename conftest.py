@@ -0,0 +1,8 @@
+# pytest setup for tests/: the game's modules sit at the top level (not in a
+# package), and having this file here puts that directory on sys.path. Tests
+# run quiet and without a window or audio device.
+import os
+
+os.environ.setdefault("ROGUEBIRD_LOG", "off")
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
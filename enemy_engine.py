@@ -0,0 +1,477 @@
+# NumPy enemy backend for big waves.
+#
+# Same skeleton rules as sim.Enemy, but every skeleton is a row in a handful of
+# arrays (position, facing, health, cooldown, attacking flag, animation cursors)
+# and a tick is a few whole-array operations instead of two Python calls per
+# skeleton. Pick it with World(enemy_backend="numpy") / sim.py --numpy.
+#
+# The object path updates skeletons one after another, and a skeleton landing a
+# hit knocks the hero back before the next one looks at him. To keep that exact,
+# think() works in segments: everything up to and including the next skeleton that
+# lands a hit is done in one batch, the hit is applied, then the rest carries on.
+# Hits are rare, so in practice a tick is one or two segments.
+import numpy as np
+
+import eventlog
+from animation import get_clip
+
+# Skeleton tuning and AI level of detail come straight from sim, so the two
+# backends can't drift apart (sim only imports this module from inside World).
+from sim import (
+    AI_FAR_EVERY,
+    AI_NEAR,
+    ATTACK_RANGE,
+    ENEMY_ATTACK_COOLDOWN,
+    ENEMY_DAMAGE,
+    INTERRUPT_COOLDOWN,
+    KNOCKBACK,
+    RUN_PRIORITY,
+)
+
+RIGHT = 1
+LEFT = -1
+
+combat_log = eventlog.channel("combat")  # same channel as sim's
+
+# Clip ids. 0 is "no action clip" (cur) / "base image" (img_clip).
+NO_CLIP, IDLE, RUN_RIGHT, RUN_LEFT, ATTACK_RIGHT, ATTACK_LEFT, DEATH = range(7)
+
+
+# Per-skeleton arrays: (attribute, dtype, value for a fresh skeleton).
+# x comes from the spawn spots and health from the caller.
+_COLUMNS = (
+    ("x", np.float64, 0),
+    ("orientation", np.int8, RIGHT),
+    ("health", np.int64, 0),
+    ("alive", bool, True),
+    ("attack_cooldown", np.int64, 0),
+    ("attacking", bool, False),
+    # action cursor (run/attack/death) and the separate idle cursor
+    ("cur", np.int8, NO_CLIP),
+    ("frame", np.int32, 0),
+    ("tick", np.int32, 0),
+    ("idle_frame", np.int32, 0),
+    ("idle_tick", np.int32, 0),
+    # what the sprite currently shows
+    ("img_clip", np.int8, NO_CLIP),
+    ("img_frame", np.int32, 0),
+    ("has_voice", bool, False),
+    # AI level of detail: 1, AI_FAR_EVERY (0 once dead) and when a far one thinks next
+    ("ai_step", np.int64, 1),
+    ("ai_tick", np.int64, 0),
+)
+
+
+class EnemyEngine:
+    def __init__(self, world, name="skeleton"):
+        self.world = world
+        self.name = name
+        # Same clips (and therefore frames) the object path would use.
+        self.clips = [
+            None,
+            get_clip(name, "idle", 10, True, loop=True, priority=0, fallback_frames=(name,)),
+            get_clip(name, "run_right", 3, False, loop=True, priority=RUN_PRIORITY),
+            get_clip(name, "run_left", 3, False, loop=True, priority=RUN_PRIORITY),
+            get_clip(name, "attack_right", 5, True, loop=False, priority=10),
+            get_clip(name, "attack_left", 5, True, loop=False, priority=10),
+            get_clip(name, "death", 10, True, loop=False, priority=10),
+        ]
+        rest = self.clips[1:]
+        self.clip_delay = np.array([1] + [c.tick_delay for c in rest])
+        self.clip_frames = np.array([1] + [max(len(c.frames), 1) for c in rest])
+        self.clip_loop = np.array([False] + [c.loop for c in rest])
+        self.clip_priority = np.array([0] + [c.priority for c in rest])
+        self._clip_sounds = None  # clip id -> sound name
+        self._shown_names = {}  # img_clip << 32 | img_frame -> image name
+        # views are only ever added to, and reused by later waves
+        self._view_pool = []
+        self.y = 0
+        self.spawn(())
+
+    def spawn(self, xs, y=0, health=0):
+        # Starts a new wave with these skeletons; add() brings in more later.
+        self.count = 0
+        self.y = y
+        for column, dtype, _ in _COLUMNS:
+            setattr(self, column, np.zeros(0, dtype=dtype))
+        # audio.Voice per skeleton, only touched on (rare) clip switches
+        self.voices = []
+        self.add(xs, health)
+
+    def add(self, xs, health):
+        # Appends rows for newly spawned skeletons (the staggered spawner calls
+        # this a few at a time, so it's one concatenate per column per batch).
+        n = len(xs)
+        if not n:
+            return
+        for column, dtype, fill in _COLUMNS:
+            if column == "x":
+                new = np.array(xs, dtype=dtype)
+            elif column == "health":
+                new = np.full(n, health, dtype=dtype)
+            elif column == "ai_tick":
+                new = np.full(n, self.world.tick_count, dtype=dtype)
+            else:
+                new = np.full(n, fill, dtype=dtype)
+            setattr(self, column, np.concatenate((getattr(self, column), new)))
+        self.voices.extend([None] * n)
+        self.count += n
+
+    def load(self, count, y, columns):
+        # Swaps in a whole new set of rows (snapshot.restore); columns is
+        # column name -> array, as in _COLUMNS.
+        self._stop_voices(np.arange(self.count))
+        self.count = count
+        self.y = y
+        for column, _, _ in _COLUMNS:
+            setattr(self, column, columns[column])
+        self.has_voice[:] = False  # the voices themselves didn't come along
+        self.voices = [None] * count
+
+    def views(self, start=0):
+        pool = self._view_pool
+        while len(pool) < self.count:
+            pool.append(EnemyView(self, len(pool)))
+        return pool[start : self.count]
+
+    def any_alive(self):
+        return bool(self.alive.any())
+
+    def nearest(self, x, orientation=None, reach=None):
+        mask = self.alive.copy()
+        if orientation == "right":
+            mask &= self.x > x
+        elif orientation == "left":
+            mask &= self.x < x
+        dist = np.abs(self.x - x)
+        if reach is not None:
+            mask &= dist <= reach
+        if not mask.any():
+            return None
+        # argmin picks the first of equals, same as the object path's strict "<"
+        return EnemyView(self, int(np.argmin(np.where(mask, dist, np.inf))))
+
+    def within(self, x, reach):
+        indices = np.flatnonzero(self.alive & (np.abs(self.x - x) <= reach))
+        return [EnemyView(self, i) for i in indices.tolist()]
+
+    # -- per tick ---------------------------------------------------------
+
+    def step(self, hero):
+        self.think(hero)
+        self.animate()
+
+    def think(self, hero):
+        # The far skeletons due this tick, then the near ones – the same two
+        # lots sim.World.think goes through. Returns how many thought.
+        if not hero.alive:
+            return 0
+        coarse = self.ai_step > 1
+        thought = 0
+        for due in (coarse & (self.ai_tick == self.world.tick_count), ~coarse):
+            due &= self.alive
+            if not due.any():
+                continue
+            self._due = due
+            start = 0
+            while start < self.count:
+                start = self._think(start, hero)
+            thought += int(due.sum())
+        return thought
+
+    def animate(self):
+        self._animate(0, self.count)
+
+    def _think(self, start, hero):
+        # AI for [start, end); returns end. end stops right after the next hit on the hero.
+        n = self.count
+        if not hero.alive:
+            return n
+        target_x = hero.actor.x
+        dist = np.abs(self.x[start:] - target_x)
+        due = self._due[start:]
+        resolving = due & self.attacking[start:] & (self.cur[start:] == NO_CLIP)
+        hits = np.flatnonzero(resolving & (dist <= ATTACK_RANGE))
+        end = start + int(hits[0]) + 1 if len(hits) else n
+        seg = slice(start, end)
+        dist = dist[: end - start]
+        resolving = resolving[: end - start]
+        # everything below writes straight through these views
+        x = self.x[seg]
+        orientation = self.orientation[seg]
+        cooldown = self.attack_cooldown[seg]
+        attacking = self.attacking[seg]
+        cur = self.cur[seg]
+
+        active = due[: end - start]
+        ai_step = self.ai_step[seg]
+        ai_tick = self.ai_tick[seg]
+        elapsed = ai_step.copy()  # ticks this covers
+        coarse = active & (elapsed > 1)
+        if coarse.any():
+            # far ones: every tick from the next one if they're close again,
+            # else look again AI_FAR_EVERY ticks on
+            closing = coarse & (dist <= AI_NEAR)
+            np.copyto(ai_step, 1, where=closing)
+            ai_tick += np.where(coarse & ~closing, elapsed, 0)
+        cooldown -= np.minimum(cooldown, elapsed) * active
+
+        # attacks whose animation just ended: land (handled below) or whiff
+        far = dist > ATTACK_RANGE
+        if resolving.any():
+            if combat_log.verbose:
+                for i in np.flatnonzero(resolving & far):
+                    combat_log.debug("{name}'s attack missed", name=self.name)
+            np.copyto(cooldown, ENEMY_ATTACK_COOLDOWN, where=resolving)
+        idle_minded = active & ~attacking
+        attacking &= ~resolving
+
+        # walk towards the hero
+        move = idle_minded & far
+        if move.any():
+            heading = np.where(x < target_x, RIGHT, LEFT)
+            np.copyto(orientation, heading, where=move, casting="unsafe")
+            left_behind = move & (elapsed == 1) & (dist > AI_NEAR)
+            np.copyto(ai_step, AI_FAR_EVERY, where=left_behind)
+            np.copyto(ai_tick, self.world.tick_count + AI_FAR_EVERY, where=left_behind)
+            # a pixel a tick, never walking into range on a catch-up step
+            steps = np.minimum(elapsed, np.ceil(dist - ATTACK_RANGE))
+            x += np.where(move, heading * steps, 0)
+            wanted = np.where(orientation == RIGHT, RUN_RIGHT, RUN_LEFT)
+            switch = move & (self.clip_priority[cur] <= RUN_PRIORITY) & (cur != wanted)
+            if switch.any():
+                self._play(np.flatnonzero(switch) + start, wanted[switch])
+
+        # close enough and cooled down – swing
+        swing = idle_minded & ~far & (cooldown == 0)
+        if swing.any():
+            attacking |= swing
+            wanted = np.where(orientation == RIGHT, ATTACK_RIGHT, ATTACK_LEFT)
+            indices = np.flatnonzero(swing) + start
+            self._play(indices, wanted[swing])
+            if combat_log.verbose:
+                for i in indices:
+                    combat_log.debug(
+                        "{name} attacks with {animation}",
+                        name=self.name,
+                        animation=self.clips[self.cur[i]].animation_name,
+                    )
+
+        if len(hits):
+            self._hit_hero(end - 1, hero)
+        return end
+
+    def _hit_hero(self, i, target):
+        target.health -= ENEMY_DAMAGE
+        if self.orientation[i] == RIGHT:
+            target.actor.x -= KNOCKBACK
+        else:
+            target.actor.x += KNOCKBACK
+        if combat_log.verbose:
+            combat_log.debug(
+                "{name} hit {target} for {damage} HP!",
+                name=self.name,
+                target=target.name,
+                damage=ENEMY_DAMAGE,
+            )
+        if target.health <= 0:
+            target.die()
+
+    def _animate(self, start, end):
+        # Animation.update() for every row at once – action clip if one is playing,
+        # otherwise the idle loop (living skeletons only).
+        seg = slice(start, end)
+        cur = self.cur[seg]
+        tick = self.tick[seg]
+        frame = self.frame[seg]
+        shown_clip = self.img_clip[seg]
+        shown_frame = self.img_frame[seg]
+
+        playing = cur != NO_CLIP
+        tick += playing
+        advance = playing & (tick >= self.clip_delay[cur])
+        tick *= ~advance
+        at_end = frame >= self.clip_frames[cur] - 1
+        frame += advance & ~at_end
+        wrapped = advance & at_end
+        looping = self.clip_loop[cur]
+        frame *= ~(wrapped & looping)
+        np.copyto(shown_clip, cur, where=playing)
+        np.copyto(shown_frame, frame, where=playing)
+
+        idle = ~playing & self.alive[seg]
+        idle_tick = self.idle_tick[seg]
+        idle_frame = self.idle_frame[seg]
+        idle_tick += idle
+        advance = idle_tick >= self.clip_delay[IDLE]  # only idle rows ever get there
+        idle_tick *= ~advance
+        idle_frame += advance
+        idle_frame %= self.clip_frames[IDLE]
+        np.copyto(shown_clip, IDLE, where=idle)
+        np.copyto(shown_frame, idle_frame, where=idle)
+
+        finished = wrapped & ~looping
+        if finished.any():
+            done = np.flatnonzero(finished) + start
+            self._stop_voices(done)
+            self.cur[done] = NO_CLIP
+
+    # -- clip switches + sounds (the only per-skeleton Python left) --------
+
+    def _play(self, indices, clips):
+        if not len(indices):
+            return
+        self._stop_voices(indices)
+        self.cur[indices] = clips
+        self.frame[indices] = 0
+        self.tick[indices] = 0
+        names = self._sounds()
+        if not names:
+            return
+        audio = self.world.sounds
+        for i, clip in zip(indices, clips):
+            name = names.get(int(clip))
+            if name:
+                # skeletons swinging together end up sharing one voice (audio.py)
+                voice = audio.play(name, loops=-1 if clip in (RUN_RIGHT, RUN_LEFT) else 0)
+                if voice is not None:
+                    self.voices[i] = voice
+                    self.has_voice[i] = True
+
+    def _stop_voices(self, indices):
+        audio = self.world.sounds
+        for i in indices[self.has_voice[indices]]:
+            audio.stop(self.voices[i])
+            self.voices[i] = None
+        self.has_voice[indices] = False
+
+    def _sounds(self):
+        # clip id -> sound name, resolved once per world instead of on every switch
+        if self._clip_sounds is None:
+            self._clip_sounds = {}
+            audio = self.world.sounds
+            if audio is not None:
+                for clip_id, clip in enumerate(self.clips):
+                    if clip is None or clip_id == IDLE:
+                        continue
+                    base = clip.animation_name
+                    if base.endswith("_right") or base.endswith("_left"):
+                        base = base.rsplit("_", 1)[0]
+                    name = f"{self.name}_{base}"
+                    if audio.handle(name) is not None:
+                        self._clip_sounds[clip_id] = name
+        return self._clip_sounds
+
+    # -- drawing ------------------------------------------------------------
+
+    def image_name(self, i):
+        clip = self.img_clip[i]
+        if clip == NO_CLIP:
+            return self.name
+        return self.clips[clip].frames[self.img_frame[i]]
+
+    def sprites(self):
+        # (view, image name, x, y) per row, for drawing (World.sprites).
+        names = self._shown_names
+        xs = self.x.tolist()
+        shown = (self.img_clip.astype(np.int64) << 32 | self.img_frame).tolist()
+        views = self.views(0)
+        y = self.y
+        sprites = []
+        for i, code in enumerate(shown):
+            name = names.get(code)
+            if name is None:
+                name = names[code] = self.image_name(i)
+            sprites.append((views[i], name, xs[i], y))
+        return sprites
+
+
+class _PositionView:
+    __slots__ = ("engine", "index")
+
+    def __init__(self, engine, index):
+        self.engine = engine
+        self.index = index
+
+    @property
+    def x(self):
+        return float(self.engine.x[self.index])
+
+    @x.setter
+    def x(self, value):
+        self.engine.x[self.index] = value
+
+    @property
+    def y(self):
+        return self.engine.y
+
+
+# Looks enough like an Enemy for the hero's attack code (and bots) to poke at one row.
+class EnemyView:
+    __slots__ = ("engine", "index", "actor")
+
+    def __init__(self, engine, index):
+        self.engine = engine
+        self.index = index
+        self.actor = _PositionView(engine, index)
+
+    @property
+    def name(self):
+        return self.engine.name
+
+    @property
+    def alive(self):
+        return bool(self.engine.alive[self.index])
+
+    @property
+    def health(self):
+        return int(self.engine.health[self.index])
+
+    @health.setter
+    def health(self, value):
+        self.engine.health[self.index] = value
+
+    @property
+    def attacking(self):
+        return bool(self.engine.attacking[self.index])
+
+    @property
+    def attack_cooldown(self):
+        return int(self.engine.attack_cooldown[self.index])
+
+    @property
+    def ai_tick(self):
+        return int(self.engine.ai_tick[self.index])
+
+    @property
+    def ai_step(self):
+        return int(self.engine.ai_step[self.index])
+
+    @property
+    def orientation(self):
+        return "right" if self.engine.orientation[self.index] == RIGHT else "left"
+
+    def shift(self, dx):
+        self.engine.x[self.index] += dx
+
+    def die(self):
+        engine, i = self.engine, self.index
+        if not engine.alive[i]:
+            return
+        engine.alive[i] = False
+        engine.ai_step[i] = 0
+        engine._play(np.array([i]), np.array([DEATH], dtype=np.int8))
+        if combat_log.verbose:
+            combat_log.debug("{name} is dying...", name=engine.name)
+
+    def interrupt_attack(self):
+        engine, i = self.engine, self.index
+        if engine.attacking[i]:
+            if combat_log.verbose:
+                combat_log.debug(
+                    "{name}'s attack got interrupted by the hero (eat that?)", name=engine.name
+                )
+            engine.attacking[i] = False
+            if engine.cur[i] in (ATTACK_RIGHT, ATTACK_LEFT):
+                engine.cur[i] = NO_CLIP
+            engine.attack_cooldown[i] = INTERRUPT_COOLDOWN
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# Many headless games at once, for bots and automated playtesting.
+#
+# GameEnv wraps one sim.World behind reset()/step(action), with a fixed-size
+# float32 observation. VecEnv runs N of them, split across worker processes
+# (each one steps its whole share per message, so the pipe traffic is one
+# round trip per batch rather than per game), and hands back stacked arrays:
+#
+#     with VecEnv(256, workers=8, seed=1) as envs:
+#         obs = envs.reset()                      # (256, OBS_SIZE)
+#         obs, rewards, dones, infos = envs.step(actions)
+#
+# Actions are the replay input bits (replay.LEFT | replay.ATTACK, ...). A game
+# that ends (hero dead, or max_ticks) is reset on the spot: its row already
+# holds the new game's first observation and infos[i] has the finished one's
+# summary. Needs numpy.
+#
+#     python env.py --envs 256 --workers 8 --steps 2000
+import argparse
+import contextlib
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+import eventlog
+from replay import unpack_inputs
+from sim import MAX_ENEMY_HEALTH, MAX_HERO_HEALTH, WIDTH, InputState, World
+
+NEAREST = 8  # skeletons in the observation, closest first
+HERO_FEATURES = 7
+ENEMY_FEATURES = 4
+OBS_SIZE = HERO_FEATURES + NEAREST * ENEMY_FEATURES
+ACTIONS = 16  # every combination of the four input bits
+
+
+class GameEnv:
+    # repeat: ticks each step() holds the action for (attacks only swing on the first).
+    def __init__(self, seed=None, repeat=1, max_ticks=5 * 60 * 60, **world_options):
+        self.rng = random.Random(seed)  # seeds for each game, so a run can be repeated
+        self.repeat = repeat
+        self.max_ticks = max_ticks
+        self.world_options = world_options
+        self.inputs = InputState()
+        self.world = None
+        self.kills = 0
+        self.total_reward = 0.0
+
+    def reset(self):
+        self.world = World(seed=self.rng.randrange(2**32), **self.world_options)
+        self.kills = 0
+        self.total_reward = 0.0
+        return self.observe()
+
+    def _dead_enemies(self):
+        return len(self.world.enemies) - self.world.enemies_alive()
+
+    def step(self, action):
+        # -> (observation, reward, done, info). Reward: +1 a kill, minus the
+        # share of the hero's health lost, -1 for dying.
+        world = self.world
+        hero = world.hero
+        health = hero.health
+        kills = 0
+        for i in range(self.repeat):
+            unpack_inputs(action, self.inputs)
+            if i:
+                self.inputs.attack = False
+            wave = world.wave_count
+            wave_size = len(world.enemies)
+            dead = self._dead_enemies()
+            world.step(self.inputs)
+            if world.wave_count != wave:
+                kills += wave_size - dead  # the last of them fell, the next wave is in
+                dead = 0
+            kills += self._dead_enemies() - dead
+            if not hero.alive:
+                break
+        reward = kills - max(health - hero.health, 0) / MAX_HERO_HEALTH
+        done = not hero.alive or world.tick_count >= self.max_ticks
+        if not hero.alive:
+            reward -= 1.0
+        self.kills += kills
+        self.total_reward += reward
+        info = {}
+        if done:
+            info = {
+                "ticks": world.tick_count,
+                "wave": world.wave_count,
+                "kills": self.kills,
+                "reward": self.total_reward,
+                "died": not hero.alive,
+            }
+        return self.observe(), reward, done, info
+
+    def observe(self, out=None):
+        # Hero: x, health, stamina, facing, dash cooldown, dashing, wave. Then
+        # the NEAREST living skeletons: dx, health, facing, attacking – all
+        # scaled to roughly -1..1, zero rows if there are fewer.
+        if out is None:
+            out = np.zeros(OBS_SIZE, dtype=np.float32)
+        else:
+            out[:] = 0.0
+        world = self.world
+        hero = world.hero
+        hero_x = hero.actor.x
+        out[0] = hero_x / WIDTH
+        out[1] = hero.health / MAX_HERO_HEALTH
+        out[2] = hero.stamina / hero.max_stamina
+        out[3] = 1.0 if hero.orientation == "right" else -1.0
+        out[4] = hero.dash_cooldown / 60
+        out[5] = hero.is_dashing
+        out[6] = world.wave_count / 100
+        living = [enemy for enemy in world.enemies if enemy.alive]
+        living.sort(key=lambda enemy: abs(enemy.actor.x - hero_x))
+        row = HERO_FEATURES
+        for enemy in living[:NEAREST]:
+            out[row] = (enemy.actor.x - hero_x) / WIDTH
+            out[row + 1] = enemy.health / MAX_ENEMY_HEALTH
+            out[row + 2] = 1.0 if enemy.orientation == "right" else -1.0
+            out[row + 3] = enemy.attacking
+            row += ENEMY_FEATURES
+        return out
+
+
+class _Batch:
+    # A worker's share of the games, stepped together.
+    def __init__(self, seeds, options):
+        self.envs = [GameEnv(seed=seed, **options) for seed in seeds]
+        self.obs = np.zeros((len(self.envs), OBS_SIZE), dtype=np.float32)
+
+    def reset(self):
+        for env, row in zip(self.envs, self.obs):
+            env.reset()
+            env.observe(row)
+        return self.obs
+
+    def step(self, actions):
+        rewards = np.zeros(len(self.envs), dtype=np.float32)
+        dones = np.zeros(len(self.envs), dtype=bool)
+        infos = []
+        for i, env in enumerate(self.envs):
+            _, rewards[i], dones[i], info = env.step(int(actions[i]))
+            if dones[i]:
+                env.reset()
+            env.observe(self.obs[i])
+            infos.append(info)
+        return self.obs, rewards, dones, infos
+
+
+def _output(quiet):
+    # The game's log events (eventlog.py) aren't much use times a few hundred.
+    return eventlog.muted() if quiet else contextlib.nullcontext()
+
+
+def _worker(conn, seeds, options, quiet):
+    with _output(quiet):
+        batch = _Batch(seeds, options)
+        while True:
+            command, data = conn.recv()
+            if command == "step":
+                conn.send(batch.step(data))
+            elif command == "reset":
+                conn.send(batch.reset())
+            else:
+                break
+    conn.close()
+    eventlog.flush()  # worker processes skip atexit
+
+
+class VecEnv:
+    # workers=0 steps everything in this process (handy under a debugger);
+    # None means one per CPU. Extra keyword arguments go to GameEnv/World.
+    def __init__(self, count, workers=None, seed=None, quiet=True, **options):
+        self.count = count
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, count)
+        seeder = random.Random(seed)
+        seeds = [seeder.randrange(2**32) for _ in range(count)]
+        self.quiet = quiet
+        self._local = None
+        self._conns = []
+        self._procs = []
+        self._slices = []
+        if not workers:
+            with _output(quiet):
+                self._local = _Batch(seeds, options)
+            self._slices.append(slice(0, count))
+            return
+        ctx = multiprocessing.get_context()
+        for w in range(workers):
+            share = slice(w * count // workers, (w + 1) * count // workers)
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_worker,
+                args=(child, seeds[share], options, quiet),
+                name=f"env-{w}",
+                daemon=True,
+            )
+            proc.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(proc)
+            self._slices.append(share)
+
+    def reset(self):
+        if self._local is not None:
+            with _output(self.quiet):
+                return self._local.reset().copy()
+        for conn in self._conns:
+            conn.send(("reset", None))
+        return np.concatenate([conn.recv() for conn in self._conns])
+
+    def step(self, actions):
+        # -> (observations, rewards, dones, infos), one row/entry per game.
+        actions = np.asarray(actions, dtype=np.int8)
+        if self._local is not None:
+            with _output(self.quiet):
+                obs, rewards, dones, infos = self._local.step(actions)
+            return obs.copy(), rewards, dones, infos
+        for conn, share in zip(self._conns, self._slices):
+            conn.send(("step", actions[share]))  # all of them first, so they run together
+        results = [conn.recv() for conn in self._conns]
+        infos = []
+        for result in results:
+            infos.extend(result[3])
+        return (
+            np.concatenate([result[0] for result in results]),
+            np.concatenate([result[1] for result in results]),
+            np.concatenate([result[2] for result in results]),
+            infos,
+        )
+
+    def close(self):
+        for conn in self._conns:
+            with contextlib.suppress(OSError):
+                conn.send(("close", None))
+            conn.close()
+        for proc in self._procs:
+            proc.join(timeout=5)
+        self._conns.clear()
+        self._procs.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Step lots of headless games in parallel with random inputs and report the throughput."
+    )
+    parser.add_argument("--envs", type=int, default=64, help="Number of games.")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: one per CPU, 0: none)."
+    )
+    parser.add_argument("--steps", type=int, default=1000, help="Steps to run every game for.")
+    parser.add_argument("--repeat", type=int, default=1, help="Ticks per step.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the games' seeds.")
+    parser.add_argument("--wave", type=int, default=1, help="Wave every game starts at.")
+    parser.add_argument(
+        "--numpy", action="store_true", help="Use the vectorized (NumPy) enemy backend."
+    )
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    finished = []
+    with VecEnv(
+        args.envs,
+        workers=args.workers,
+        seed=args.seed,
+        repeat=args.repeat,
+        wave_count=args.wave,
+        enemy_backend="numpy" if args.numpy else "objects",
+    ) as envs:
+        envs.reset()
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            actions = rng.integers(0, ACTIONS, size=args.envs)
+            _, _, dones, infos = envs.step(actions)
+            finished.extend(info for info, done in zip(infos, dones) if done)
+        elapsed = time.perf_counter() - start
+    ticks = args.envs * args.steps * args.repeat
+    print(
+        f"{args.envs} games x {args.steps} steps in {elapsed:.3f}s "
+        f"({ticks / elapsed:.0f} ticks/s, {args.envs * args.steps / elapsed:.0f} steps/s) – "
+        f"{len(finished)} games finished"
+    )
+    if finished:
+        best = max(info["wave"] for info in finished)
+        kills = sum(info["kills"] for info in finished) / len(finished)
+        print(f"furthest wave {best}, {kills:.1f} kills per finished game")
+
+
+if __name__ == "__main__":
+    main()
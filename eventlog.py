@@ -0,0 +1,304 @@
+# Structured event log, written off the game loop.
+#
+# Code logs through a channel per category (combat, sound, ...): a level, a
+# message template and its fields.
+#
+#     combat_log = eventlog.channel("combat")
+#     if combat_log.verbose:  # hot paths: nothing at all happens when it's off
+#         combat_log.debug("{name} hit {target} for {damage} HP!", name=..., ...)
+#     game_log.info("Saved the game to {path}", path=path)
+#
+# An event is only a tuple put on a queue; a background thread formats it and
+# does the (blocking) writes, a batch at a time. Each channel is rate limited
+# (token bucket, `rate` events a second) so a big wave can't flood the output –
+# what gets dropped is counted and reported once the channel is let through
+# again. Fields are formatted on the writer thread, so pass plain values
+# (names, numbers), not objects that keep changing.
+#
+# What's logged comes from ROGUEBIRD_LOG: a level, optionally followed by
+# per-category ones, or "off":
+#
+#     ROGUEBIRD_LOG=debug                  # everything
+#     ROGUEBIRD_LOG=info,combat=debug      # the default level, plus all of combat
+#     ROGUEBIRD_LOG=warning,sound=off
+#
+# The default is info (waves, saves, replays, warnings) – the per-tick chatter
+# (hits, swings, sounds, animation switches) is debug. ROGUEBIRD_LOG_RATE sets
+# the rate limit (0: none), ROGUEBIRD_LOG_FILE sends JSON lines to a file
+# instead of text to stdout.
+import atexit
+import contextlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": OFF}
+_LEVEL_NAMES = {level: name for name, level in LEVELS.items()}
+
+DEFAULT_SPEC = "info"
+DEFAULT_RATE = 20  # events a second per channel
+
+_clock = time.perf_counter
+_start = _clock()
+
+_channels = {}  # category -> Channel
+_levels = {}  # category -> level, from the spec
+_default_level = INFO
+_rate = DEFAULT_RATE
+_muted = 0
+
+_queue = queue.SimpleQueue()  # (time, level, category, template, fields); None stops the writer
+_writer = None
+_path = None  # JSON lines go here instead of text to stdout
+_closed = False
+
+
+class Channel:
+    __slots__ = ("category", "level", "verbose", "dropped", "_dropping", "_tokens", "_last")
+
+    def __init__(self, category):
+        self.category = category
+        self.level = OFF
+        self.verbose = False  # debug events are being kept
+        self.dropped = 0  # events lost to the rate limit, all told
+        self._dropping = 0  # ...since the last one that got through
+        self._tokens = float(_rate)
+        self._last = _clock()
+        _apply(self)
+
+    def debug(self, template, **fields):
+        if self.level <= DEBUG:
+            self._emit(DEBUG, template, fields)
+
+    def info(self, template, **fields):
+        if self.level <= INFO:
+            self._emit(INFO, template, fields)
+
+    def warning(self, template, **fields):
+        if self.level <= WARNING:
+            self._emit(WARNING, template, fields)
+
+    def error(self, template, **fields):
+        if self.level <= ERROR:
+            self._emit(ERROR, template, fields)
+
+    def _emit(self, level, template, fields):
+        now = _clock()
+        if _rate:
+            tokens = min(float(_rate), self._tokens + (now - self._last) * _rate)
+            self._last = now
+            if tokens < 1.0:
+                self._tokens = tokens
+                self.dropped += 1
+                self._dropping += 1
+                return
+            self._tokens = tokens - 1.0
+            if self._dropping:
+                self._report_dropped(now)
+        _submit((now, level, self.category, template, fields))
+
+    def _report_dropped(self, now):
+        _submit(
+            (
+                now,
+                WARNING,
+                self.category,
+                "{count} {category} events dropped (rate limit)",
+                {"count": self._dropping, "category": self.category},
+            )
+        )
+        self._dropping = 0
+
+
+def channel(category):
+    log = _channels.get(category)
+    if log is None:
+        log = _channels[category] = Channel(category)
+    return log
+
+
+def _apply(log):
+    log.level = OFF if _muted else _levels.get(log.category, _default_level)
+    log.verbose = log.level <= DEBUG
+
+
+def parse_spec(spec):
+    # "info,combat=debug" -> (INFO, {"combat": DEBUG})
+    default = INFO
+    levels = {}
+    for part in spec.replace(" ", "").lower().split(","):
+        if not part:
+            continue
+        category, _, name = part.rpartition("=")
+        if name not in LEVELS:
+            raise ValueError(f"Unknown log level {name!r} (one of {', '.join(LEVELS)})")
+        if category:
+            levels[category] = LEVELS[name]
+        else:
+            default = LEVELS[name]
+    return default, levels
+
+
+def configure(spec=None, rate=None, path=None):
+    # Anything left as None keeps its current setting.
+    global _default_level, _levels, _rate, _path
+    if spec is not None:
+        _default_level, _levels = parse_spec(spec)
+    if rate is not None:
+        _rate = rate
+    if path is not None:
+        _path = path or None
+    for log in _channels.values():
+        _apply(log)
+
+
+@contextlib.contextmanager
+def muted():
+    # Nothing gets logged inside (headless batch runs, benchmarks).
+    global _muted
+    _muted += 1
+    for log in _channels.values():
+        _apply(log)
+    try:
+        yield
+    finally:
+        _muted -= 1
+        for log in _channels.values():
+            _apply(log)
+
+
+def format_event(event):
+    when, level, category, template, fields = event
+    try:
+        message = template.format(**fields)
+    except (KeyError, IndexError, ValueError) as e:
+        message = f"{template} {fields!r} (bad template: {e})"
+    if _path is None:
+        return f"[{_LEVEL_NAMES[level].upper()}] {category}: {message}\n"
+    return (
+        json.dumps(
+            {
+                "t": round(when - _start, 6),
+                "level": _LEVEL_NAMES[level],
+                "category": category,
+                "event": template,
+                "message": message,
+                "fields": fields,
+            },
+            default=str,
+        )
+        + "\n"
+    )
+
+
+def _write(lines):
+    if _path is not None:
+        with open(_path, "a") as f:
+            f.writelines(lines)
+        return
+    out = sys.stdout
+    if out is not None:
+        out.writelines(lines)
+        out.flush()
+
+
+def _work():
+    # One write (and flush) for everything that's queued up by the time it
+    # looks. An Event in the queue is flush() waiting: it's set once everything
+    # before it is written. None stops the thread.
+    get = _queue.get
+    get_nowait = _queue.get_nowait
+    while True:
+        item = get()
+        lines = []
+        waiting = []
+        while True:
+            if item is None:
+                break
+            if isinstance(item, threading.Event):
+                waiting.append(item)
+            else:
+                lines.append(format_event(item))
+            try:
+                item = get_nowait()
+            except queue.Empty:
+                break
+        if lines:
+            try:
+                _write(lines)
+            except (OSError, ValueError):
+                pass  # stdout gone (closed pipe) – nowhere left to say so
+        for done in waiting:
+            done.set()
+        if item is None:
+            return
+
+
+def _running():
+    # The writer, started if there isn't a live one (first event, after a fork).
+    global _writer
+    if _writer is None or not _writer.is_alive():
+        _writer = threading.Thread(target=_work, name="eventlog", daemon=True)
+        _writer.start()
+    return _writer
+
+
+def _submit(event):
+    if _closed:
+        _write([format_event(event)])  # shutting down: no thread to hand it to
+        return
+    _running()
+    _queue.put(event)
+
+
+def flush(timeout=2.0):
+    # Waits (up to timeout seconds) until everything logged so far is written.
+    # The writer keeps running, so there's only ever the one.
+    now = _clock()
+    for log in _channels.values():
+        if log._dropping:
+            log._report_dropped(now)
+    if _closed or (_writer is None and _queue.empty()):
+        return
+    _running()
+    done = threading.Event()
+    _queue.put(done)
+    done.wait(timeout)
+
+
+def close():
+    # Last words (atexit): flush, stop the writer, write anything later directly.
+    global _closed
+    if _closed:
+        return
+    flush()
+    _closed = True
+    if _writer is not None and _writer.is_alive():
+        _queue.put(None)
+        _writer.join(1.0)
+
+
+def _after_fork():
+    # A forked child (env.py workers) gets the queue but not the thread.
+    global _queue, _writer
+    _queue = queue.SimpleQueue()
+    _writer = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+atexit.register(close)
+
+configure(
+    os.environ.get("ROGUEBIRD_LOG", DEFAULT_SPEC),
+    rate=float(os.environ.get("ROGUEBIRD_LOG_RATE", DEFAULT_RATE)),
+    path=os.environ.get("ROGUEBIRD_LOG_FILE"),
+)
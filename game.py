@@ -1,20 +1,28 @@
 import pgzrun
+import atexit
+import functools
+import os
 import random
 import sys
 
-# Wndow size set to match our bg masterpiece (928 x 335)
-WIDTH = 928
-HEIGHT = 335
-GAME_FLOOR = 255  # Floor lvl where our chars stand
-
-# Basic stats – nothing fancy
-MAX_HERO_HEALTH = 100
-MAX_ENEMY_HEALTH = 50
+import eventlog
+import snapshot
+from animation import frame_bases
+from atlas import install_atlas
+from audio import SOUND_PRIORITY, VoiceManager
+from hud import Hud
+from preload import Preloader
+from pgzero import ptext
+from profiler import FrameProfiler
+from render import DirtyRenderer
+from replay import Recorder, Replay
+from sim import HEIGHT, MAX_HERO_HEALTH, TICK_RATE, WIDTH, InputState, World
+from sprites import preload_frames, sprite_layers
+from timestep import FixedTimestep
 
 # Global state vars – game_state can be "menu" or "playing"
 game_state = "menu"
 music_on = True  # initial music settng
-wave_count = 1
 
 # Menu buttons – start, toggle music (It doesnt shut off sound effects only bg soundtrack, which is an acoustic cover of Free Bird so why would you want to turn it off?), and exit
 menu_buttons = [
@@ -23,382 +31,114 @@ menu_buttons = [
     {"action": "exit", "rect": Rect((WIDTH / 2 - 100, 220), (200, 40))},
 ]
 
-
-def spawn_wave():
-    global enemies, wave_count
-    enemies.clear()  # Clear out last wave's corpses – maybe remove this so you can see the carnage?
-    num_enemies = 2 * wave_count  # Wave 1: 2 baddies, wave 2: 4, etc.
-    print(f"[DEBUG] Spawning wave {wave_count} with {num_enemies} enemies")
-    for i in range(num_enemies):
-        # Try to spawn enemy far enough from the hero (avoid insta hugs)
-        while True:
-            x = random.randint(50, WIDTH - 50)
-            if abs(x - player.actor.x) >= 100:
-                break
-        # Note to self: Skeleton asset is a bit shorter than knight, so adjust Y a bit.
-        enemy = Enemy("skeleton", pos=(x, GAME_FLOOR + 23))
-        enemies.append(enemy)
-
-
-# Thsi Animation class is our way to make things move (or at least change imgs).
-class Animation:
-    def __init__(
-        self,
-        character_name,
-        animation_name,
-        tick_delay,
-        retain_last_frame,
-        loop=False,
-        priority=5,
-    ):
-        self.character_name = character_name
-        self.animation_name = animation_name
-        self.tick_delay = tick_delay
-        self.retain_last_frame = retain_last_frame
-        self.loop = loop
-        self.priority = priority
-        self.frames = []
-        self.load_frames()
-        self.current_frame_index = 0
-        self.tick_counter = 0
-        self.finished = False
-
-    def load_frames(self):
-        frame = 0
-        while True:
-            frame_name = f"{self.character_name}_{self.animation_name}_{frame}"
-            if hasattr(
-                images, frame_name
-            ):  ## my intellisense refuses to recognize images as a module
-                self.frames.append(frame_name)
-                frame += 1
-            else:
-                break
-        if not self.frames:
-            print(
-                f"[DEBUG] No frames found for {self.character_name}_{self.animation_name}. (ugh!)"
-            )
-        else:
-            print(
-                f"[DEBUG] Loaded {len(self.frames)} frames for {self.character_name}_{self.animation_name}."
-            )
-
-    def update(self):
-        if not self.frames:
-            return None
-        self.tick_counter += 1
-        if self.tick_counter >= self.tick_delay:
-            self.tick_counter = 0
-            if self.current_frame_index < len(self.frames) - 1:
-                self.current_frame_index += 1
-            else:
-                if self.loop:
-                    self.current_frame_index = 0
-                else:
-                    self.finished = True
-        return self.frames[self.current_frame_index]
-
-
-# Base class for all our characters (hero and baddies)
-class Character:
-    def __init__(self, name, pos=(WIDTH // 2, HEIGHT // 2)):
-        self.name = name
-        self.health = MAX_HERO_HEALTH  # Default hero health; enemies will override
-        self.alive = True
-        self.pos = pos
-        self.actor = Actor(name, pos)
-        self.orientation = "right"  # Could be "left" too
-        self.idle_animation = Animation(
-            name, "idle", tick_delay=10, retain_last_frame=True, loop=True, priority=0
-        )
-        if not self.idle_animation.frames:
-            self.idle_animation.frames = [name]
-            print(f"[DEBUG] Using fallback idle image for {name}")
-        self.animation_queue = []
-        self.current_animation = None
-        self.current_sound = None
-
-    def play_animation_sound(self, animation):
-        # Sounds need a lot of tune
-        base_anim = (
-            animation.animation_name.rsplit("_", 1)[0]
-            if animation.animation_name.endswith("_right")
-            or animation.animation_name.endswith("_left")
-            else animation.animation_name
-        )
-        sound_name = f"{self.name}_{base_anim}"
-        sound = getattr(
-            sounds, sound_name, None
-        )  ## my intellisense refuses to recognize sounds also !?
-        if sound:
-            if animation.animation_name.startswith("run_"):
-                sound.play(loops=-1)
-            else:
-                sound.play()
-            self.current_sound = sound
-            print(f"[DEBUG] Playing sound: {sound_name}")
-        else:
-            print(f"[DEBUG] No sound found for: {sound_name}")
-
-    def stop_current_sound(self):
-        if self.current_sound:
-            self.current_sound.stop()
-            self.current_sound = None
-
-    def set_animation(self, new_animation):
-        self.stop_current_sound()
-        self.current_animation = new_animation
-        self.play_animation_sound(new_animation)
-
-    def run(self):
-        run_priority = 5
-        if self.current_animation and self.current_animation.priority > run_priority:
-            return
-        desired_animation = f"run_{self.orientation}"
-        if (
-            self.current_animation
-            and self.current_animation.animation_name == desired_animation
-        ):
-            return
-        self.animation_queue.clear()
-        new_anim = Animation(
-            self.name,
-            desired_animation,
-            tick_delay=3,
-            retain_last_frame=False,
-            loop=True,
-            priority=run_priority,
-        )
-        self.set_animation(new_anim)
-        print(f"[DEBUG] {self.name} is now running with {desired_animation}")
-
-    def attack(self):
-        # Always show the attack animation even if no enemy is hit.
-        attack_priority = 10
-        desired_animation = f"attack1_{self.orientation}"
-        self.animation_queue.clear()
-        new_anim = Animation(
-            self.name,
-            desired_animation,
-            tick_delay=5,
-            retain_last_frame=True,
-            loop=False,
-            priority=attack_priority,
-        )
-        self.set_animation(new_anim)
-        print(f"[DEBUG] {self.name} attacks with {desired_animation}")
-
-    def die(self):
-        if not self.alive:
-            return
-        self.alive = False
-        self.animation_queue.clear()
-        self.stop_current_sound()
-        death_anim = Animation(
-            self.name,
-            "death",
-            tick_delay=10,
-            retain_last_frame=True,
-            loop=False,
-            priority=10,
-        )
-        self.set_animation(death_anim)
-        print(f"[DEBUG] {self.name} is dying...")
-
-    def update_animation(self):
-        if not self.current_animation and self.animation_queue:
-            self.current_animation = self.animation_queue.pop(0)
-            self.play_animation_sound(self.current_animation)
-        if self.current_animation:
-            frame = self.current_animation.update()
-            if frame:
-                self.actor.image = frame
-            if self.current_animation.finished:
-                print(
-                    f"[DEBUG] {self.name} finished {self.current_animation.animation_name}"
-                )
-                self.stop_current_sound()
-                self.current_animation = None
-        else:
-            if self.alive:
-                frame = self.idle_animation.update()
-                if frame:
-                    self.actor.image = frame
-
-
-# Enemy subclass (skeleton) – simple, but it gets the job done.
-class Enemy(Character):
-    def __init__(self, name, pos=(WIDTH // 2, HEIGHT // 2)):
-        super().__init__(name, pos)
-        self.health = MAX_ENEMY_HEALTH
-        self.attack_cooldown = 0  # Time until next attack
-        self.attacking = False
-
-    def attack(self):
-        attack_priority = 10
-        desired_animation = f"attack_{self.orientation}"
-        self.animation_queue.clear()
-        new_anim = Animation(
-            self.name,
-            desired_animation,
-            tick_delay=5,
-            retain_last_frame=True,
-            loop=False,
-            priority=attack_priority,
-        )
-        self.set_animation(new_anim)
-        print(f"[DEBUG] {self.name} attacks with {desired_animation}")
-        # Damage is applied after the animation finishes.
-
-    def interrupt_attack(self):
-        if self.attacking:
-            print(
-                f"[DEBUG] {self.name}'s attack got interrupted by the hero (eat that?)"
-            )
-            self.attacking = False
-            self.animation_queue.clear()
-            if (
-                self.current_animation
-                and self.current_animation.animation_name.startswith("attack")
-            ):
-                self.current_animation = None
-            self.attack_cooldown = 30
-
-    def update_ai(self, target):
-        if not self.alive or not target.alive:
-            return
-        if self.attack_cooldown > 0:
-            self.attack_cooldown -= 1
-        attack_range = 50
-        damage = 20
-        knockback_amount = 10
-        if self.attacking and not self.current_animation:
-            if abs(self.actor.x - target.actor.x) <= attack_range:
-                target.health -= damage
-                if self.orientation == "right":
-                    target.actor.x -= knockback_amount
-                else:
-                    target.actor.x += knockback_amount
-                print(f"[DEBUG] {self.name} hit {target.name} for {damage} HP!")
-                if target.health <= 0:
-                    target.die()
-            else:
-                print(f"[DEBUG] {self.name}'s attack missed")
-            self.attacking = False
-            self.attack_cooldown = 60
-            return
-        if not self.attacking:
-            if abs(self.actor.x - target.actor.x) > attack_range:
-                if self.actor.x < target.actor.x:
-                    self.orientation = "right"
-                    self.actor.x += 1
-                else:
-                    self.orientation = "left"
-                    self.actor.x -= 1
-                self.run()
-            else:
-                if self.attack_cooldown == 0:
-                    self.attacking = True
-                    self.attack()
-
-
-# Our hero (knight) – dashing, attacking, and just plain cool.
-class Hero(Character):
-    def __init__(self, name, pos=(WIDTH // 2, HEIGHT // 2)):
-        super().__init__(name, pos)
-        self.stamina = 100
-        self.max_stamina = 100
-        self.dash_cooldown = 0  # Frames before another dash is allowed
-        self.is_dashing = False
-        self.dash_start_x = 0
-        self.dash_target_x = 0
-        self.dash_duration = 10  # Dash lasts 10 frames – blink and you'll miss it!
-        self.dash_timer = 0
-
-    def attack(self):
-        # Always show the attack animation even if no enemy is hit.
-        attack_cost = 20
-        if self.stamina < attack_cost:
-            print("[DEBUG] Not enough stamina to attack")
-            return
-        self.stamina -= attack_cost
-        super().attack()
-        attack_range = 50
-        damage = 20
-        knockback_amount = 10
-        target = None
-        for enemy in enemies:
-            if enemy.alive:
-                if (
-                    self.orientation == "right"
-                    and enemy.actor.x > self.actor.x
-                    and abs(enemy.actor.x - self.actor.x) <= attack_range
-                ):
-                    if not target or abs(enemy.actor.x - self.actor.x) < abs(
-                        target.actor.x - self.actor.x
-                    ):
-                        target = enemy
-                elif (
-                    self.orientation == "left"
-                    and enemy.actor.x < self.actor.x
-                    and abs(enemy.actor.x - self.actor.x) <= attack_range
-                ):
-                    if not target or abs(enemy.actor.x - self.actor.x) < abs(
-                        target.actor.x - self.actor.x
-                    ):
-                        target = enemy
-        if target:
-            target.health -= damage
-            if self.orientation == "right":
-                target.actor.x += knockback_amount
-            else:
-                target.actor.x -= knockback_amount
-            print(
-                f"[DEBUG] {self.name} hit {target.name} for {damage} HP with a  knockback!"
-            )
-            if target.health <= 0:
-                target.die()
-            if target.attacking:
-                target.interrupt_attack()
-
-    def dash(self):
-        # Dash consumes stamina – gotta spend some energy to be fast!
-        dash_cost = 20
-        if self.dash_cooldown > 0 or self.is_dashing or self.stamina < dash_cost:
-            return
-        self.stamina -= dash_cost
-        dash_distance = 150
-        self.dash_start_x = self.actor.x
-        self.dash_target_x = (
-            self.actor.x + dash_distance
-            if self.orientation == "right"
-            else self.actor.x - dash_distance
-        )
-        self.dash_duration = 10  # A quick burst over 10 frames
-        self.dash_timer = 0
-        self.is_dashing = True
-        desired_animation = f"dash_{self.orientation}"
-        self.animation_queue.clear()
-        # Set the dash animation to loop only during the dash period.
-        dash_anim = Animation(
-            self.name,
-            desired_animation,
-            tick_delay=3,
-            retain_last_frame=False,
-            loop=True,
-            priority=15,
-        )
-        self.set_animation(dash_anim)
-        print(f"[DEBUG] {self.name} started a dash to the {self.orientation}")
-
-
-# Create our hero (Named Niyazi) and spawn the first wave
-player = Hero("knight", pos=(WIDTH // 2, GAME_FLOOR))
-enemies = []
-spawn_wave()
-
-
-def draw_menu():
+# Log lines go out on a background thread, rate limited (eventlog.py). The
+# per-hit/per-swing/per-sound lines that used to be printed every time are
+# debug level now, so they're hidden by default: ROGUEBIRD_LOG=debug brings
+# them back.
+game_log = eventlog.channel("game")
+
+# All the sprite frames come out of one packed atlas page instead of ~150 PNGs.
+install_atlas(images)
+
+# Sound effects get their own channel pool with per-sound caps (audio.py).
+audio = VoiceManager(sounds)
+
+# ROGUEBIRD_RECORD=run.rbr saves this session's seed + inputs on exit,
+# ROGUEBIRD_REPLAY=run.rbr plays one back instead of the keyboard (replay.py).
+# Big waves trickle in over a few frames, at most ~2 ms of spawning per frame –
+# except when recording/replaying, where the time budget would break determinism.
+replay = recorder = None
+world_options = {"spawn_budget_ms": 2.0}
+if os.environ.get("ROGUEBIRD_REPLAY"):
+    replay = Replay.load(os.environ["ROGUEBIRD_REPLAY"])
+    world_options = replay.world_options()
+elif os.environ.get("ROGUEBIRD_RECORD"):
+    world_options = {"seed": random.randrange(2**32)}
+
+# Create our hero (Named Niyazi) and spawn the first wave – the rules live in sim.py,
+# we just hand it the sounds. Characters are drawn from their frame names
+# (World.sprites), so plain positions do instead of Actors.
+world = World(sounds=audio, **world_options)
+player = world.hero
+inputs = InputState()
+if os.environ.get("ROGUEBIRD_RECORD") and replay is None:
+    recorder = Recorder(world)
+    atexit.register(recorder.save, os.environ["ROGUEBIRD_RECORD"], world)
+
+# The last few seconds of world states (snapshot.py), one per frame that ran
+# ticks: F9 rewinds two seconds (while the hero is still alive).
+# ROGUEBIRD_RESUME=save.rbsn writes the latest one there on the way out (crash
+# or quit) and picks the session back up from it next time.
+history = snapshot.SnapshotRing(capacity=5 * TICK_RATE, keyframe_every=TICK_RATE)
+resume_path = None
+if os.environ.get("ROGUEBIRD_RESUME") and replay is None and recorder is None:
+    resume_path = os.environ["ROGUEBIRD_RESUME"]
+
+
+def save_resume():
+    if game_state == "playing" and player.alive and history.latest() is not None:
+        snapshot.save(resume_path, history.latest())
+        game_log.info("Saved the game to {path}", path=resume_path)
+    elif game_state == "playing" and not player.alive and os.path.exists(resume_path):
+        os.remove(resume_path)  # game over – nothing to pick up
+
+
+if resume_path is not None:
+    atexit.register(save_resume)
+
+# Frame timings – F3 shows them, ROGUEBIRD_PROFILE=some/file.json (or .csv) saves them on exit.
+profiler = FrameProfiler()
+world.profiler = profiler
+show_profiler = False
+if os.environ.get("ROGUEBIRD_PROFILE"):
+    atexit.register(profiler.dump, os.environ["ROGUEBIRD_PROFILE"])
+
+hud = Hud(WIDTH, MAX_HERO_HEALTH)
+
+# The rules run at a fixed TICK_RATE no matter how fast frames come: a slow frame
+# runs a few ticks to catch up instead of slowing the whole game down, a fast
+# one may run none (timestep.py).
+timestep = FixedTimestep(rate=TICK_RATE, max_steps=5)
+dash_from = None  # hero's x before the last tick, if it was dashing (see draw)
+
+# Only the bits of the screen that changed get redrawn and pushed to the display
+# (render.py). ROGUEBIRD_FULL_REDRAW=1 goes back to repainting everything.
+renderer = DirtyRenderer(images.background, enabled=not os.environ.get("ROGUEBIRD_FULL_REDRAW"))
+renderer.install()
+
+# Everything play will need gets decoded while the menu is up (preload.py): sounds
+# on a worker thread, every stored frame and the big text a slice per frame.
+# Start waits for whatever is left, so nothing loads mid-fight. (Mirrored _left
+# frames still get flipped the first time they're shown – that's no decoding.)
+preloader = Preloader()
+sound_names = set(SOUND_PRIORITY)
+for base in frame_bases():
+    # every animation's sound, even the ones that don't exist (so play never
+    # goes looking for them on disk either)
+    sound_names.add(base.rsplit("_", 1)[0] if base.endswith(("_left", "_right")) else base)
+for sound_name in sorted(sound_names):
+    preloader.add(sound_name, functools.partial(audio.handle, sound_name), threaded=True)
+preloader.add("soundtrack", lambda: sounds.soundtrack, threaded=True)
+for base in frame_bases(mirrored=False):
+    preloader.add(base, functools.partial(preload_frames, base))
+preloader.add("game over", functools.partial(hud.text.get, "GAME OVER", 60, "red"))
+preloader.start()
+
+if replay is not None or (resume_path is not None and os.path.exists(resume_path)):
+    if replay is None:
+        try:
+            snapshot.restore(world, *snapshot.load(resume_path))
+            game_log.info("Resumed wave {wave} from {path}", wave=world.wave_count, path=resume_path)
+        except ValueError as e:  # saved by an older build, or cut short
+            game_log.warning("Not resuming from {path}: {error}", path=resume_path, error=str(e))
+    preloader.finish()
+    game_state = "playing"  # straight into the action, no menu
+    if music_on:
+        sounds.soundtrack.play(loops=-1)
+
+
+def menu_layer():
+    labels = []
     for btn in menu_buttons:
         if btn["action"] == "toggle_music":
             text = "Music: On" if music_on else "Music: Off"
@@ -406,97 +146,98 @@ def draw_menu():
             text = btn["action"].capitalize() if btn["action"] != "exit" else "Exit"
             if btn["action"] == "start":
                 text = "Start"
-        screen.draw.filled_rect(btn["rect"], "gray")
-        screen.draw.rect(btn["rect"], "white")
-        screen.draw.text(text, center=btn["rect"].center, color="white", fontsize=30)
+        labels.append((btn["rect"], text))
+    return hud.menu_layer(labels)
 
 
-def draw():
-    # Always show our gorgeous background. https://edermunizz.itch.io/free-pixel-art-forest
-    screen.blit("background", (0, 0))
-    if game_state == "playing":
-        player.actor.draw()
-        for enemy in enemies:
-            enemy.actor.draw()
-        margin = 10
-        bar_width = 200
-        bar_height = 20
-        x = WIDTH - bar_width - margin
-        y = margin
-        screen.draw.rect(Rect((x, y), (bar_width, bar_height)), "white")
-        health_width = int((player.health / MAX_HERO_HEALTH) * bar_width)
-        screen.draw.filled_rect(Rect((x, y), (health_width, bar_height)), "green")
-        stamina_y = y + bar_height + 5
-        screen.draw.rect(Rect((x, stamina_y), (bar_width, bar_height)), "white")
-        stamina_width = int((player.stamina / player.max_stamina) * bar_width)
-        screen.draw.filled_rect(
-            Rect((x, stamina_y), (stamina_width, bar_height)), "blue"
+def draw_profiler():
+    # Phase: min / mean / p99 over the last few seconds
+    for i, line in enumerate(profiler.overlay_lines()):
+        surface, pos = ptext.draw(
+            line, (10, 45 + i * 14), color="yellow", fontsize=16, surf=screen.surface
         )
-        screen.draw.text(
-            f"Wave: {wave_count}", (margin, margin), color="white", fontsize=30
-        )
-        if not player.alive:
-            screen.draw.text(
-                "GAME OVER", center=(WIDTH // 2, HEIGHT // 2), color="red", fontsize=60
-            )
-    elif game_state == "menu":
-        draw_menu()
+        renderer.touch(surface.get_rect(topleft=pos))  # so it gets painted over next frame
 
 
-def update():
-    global wave_count, game_state
+def draw():
+    profiler.start()
+    # Our gorgeous background (https://edermunizz.itch.io/free-pixel-art-forest) sits
+    # behind everything; the renderer only repaints the parts that changed.
+    layers = []
     if game_state == "playing":
-        if player.alive:
-            if not player.is_dashing:
-                moved = False
-                if keyboard.left or keyboard.a:
-                    player.orientation = "left"
-                    player.actor.x -= 2
-                    moved = True
-                elif keyboard.right or keyboard.d:
-                    player.orientation = "right"
-                    player.actor.x += 2
-                    moved = True
-
-                if moved:
-                    player.run()
-                else:
-                    if (
-                        player.current_animation
-                        and player.current_animation.animation_name.startswith("run_")
-                    ):
-                        player.current_animation = None
-                        player.animation_queue.clear()
-                        player.stop_current_sound()
-
-                if keyboard.space:
-                    player.dash()
-            else:
-                progress = player.dash_timer / player.dash_duration
-                player.actor.x = player.dash_start_x + progress * (
-                    player.dash_target_x - player.dash_start_x
-                )
-                player.dash_timer += 1
-                if player.dash_timer >= player.dash_duration:
-                    player.is_dashing = False
-                    player.dash_cooldown = 60
-                    player.current_animation = None
-
-            if player.stamina < player.max_stamina:
-                player.stamina = min(player.max_stamina, player.stamina + 1)
-        if player.dash_cooldown > 0:
-            player.dash_cooldown = max(0, player.dash_cooldown - 1)
-
-        player.update_animation()
-        for enemy in enemies:
-            enemy.update_ai(player)
-            enemy.update_animation()
-        if player.alive and enemies and not any(enemy.alive for enemy in enemies):
-            wave_count += 1
-            spawn_wave()
+        sprites = world.sprites()  # hero first, then the skeletons
+        if dash_from is not None:
+            # A dash covers 15 px a tick, which judders when frames and ticks
+            # don't line up – draw the hero the matching part of the way there.
+            key, image, x, y = sprites[0]
+            sprites[0] = (key, image, dash_from + (x - dash_from) * timestep.alpha, y)
+        # One batch: surfaces looked up by name, off-screen ones culled (render.py)
+        layers.extend(sprite_layers(sprites))
+        # Bars + wave label only get rebuilt when they change (hud.py)
+        layers.extend(hud.layers(player, world.wave_count, screen.surface.get_rect()))
     elif game_state == "menu":
-        # Just chill in the menu until someone clicks a button.
-        pass
+        layers.append(menu_layer())
+        if not preloader.finished:
+            layers.append(hud.loading_layer(preloader.progress, (WIDTH / 2, 290)))
+    profiler.mark("layers")
+    renderer.render(screen.surface, layers)
+    profiler.mark("render")
+    profiler.count("dirty_px", renderer.dirty_area)
+    if show_profiler:
+        draw_profiler()
+    profiler.end_frame()
+
+
+def update(dt):
+    global dash_from
+    if game_state == "playing":
+        if replay is None:
+            inputs.left = keyboard.left or keyboard.a
+            inputs.right = keyboard.right or keyboard.d
+            inputs.dash = keyboard.space
+        steps = timestep.advance(dt)
+        for _ in range(steps):
+            if replay is not None:
+                if replay.finished:
+                    finish_replay()
+                replay.next_inputs(inputs)
+            if recorder is not None:
+                recorder.record(inputs)
+            dash_from = player.actor.x if player.is_dashing else None
+            world.step(inputs)
+            inputs.attack = False  # one click, one swing – not one per catch-up tick
+        if steps:
+            # once a frame, not per tick – catch-up frames are slow enough already
+            history.capture(world)
+        profiler.count("ticks", steps)
+    elif game_state == "menu":
+        # Just chill in the menu until someone clicks a button (and load stuff meanwhile).
+        preloader.step()
+
+
+def finish_replay():
+    same = replay.verify(world)
+    game_log.info(
+        "Replay finished – {result} final state as recorded", result="same" if same else "DIFFERENT"
+    )
+    sys.exit(0 if same else 1)
+
+
+def on_key_down(key):
+    global show_profiler
+    if key == keys.F3:
+        show_profiler = not show_profiler
+    elif (
+        key == keys.F9
+        and game_state == "playing"
+        and player.alive  # no coming back from the game-over screen
+        and replay is None
+        and recorder is None
+    ):
+        back = history.back_to(world.tick_count - 2 * TICK_RATE)
+        if back > 0:
+            tick = history.rewind(world, back)
+            game_log.info("Rewound to tick {tick}", tick=tick)
 
 
 def on_mouse_down(pos, button):
@@ -506,6 +247,8 @@ def on_mouse_down(pos, button):
             if btn["rect"].collidepoint(pos):
                 action = btn["action"]
                 if action == "start":
+                    preloader.finish()  # usually long done by now
+                    timestep.reset()  # don't catch up on the time spent in the menu
                     game_state = "playing"
                     if music_on:
                         sounds.soundtrack.play(loops=-1)
@@ -521,7 +264,7 @@ def on_mouse_down(pos, button):
                     sys.exit()
     elif game_state == "playing":
         if button == mouse.LEFT and player.alive:
-            player.attack()
+            inputs.attack = True  # swung at the start of the next tick
 
 
 pgzrun.go()
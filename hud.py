@@ -0,0 +1,144 @@
+# HUD + menu drawing with everything cached.
+#
+# Text is rasterized once per (string, size, colour) and kept in a small LRU.
+# The health/stamina bars and the wave label are composed into one strip that's
+# only rebuilt when one of them actually changes; every other frame it's a
+# single blit. The menu buttons get the same treatment, keyed by their labels.
+from collections import OrderedDict
+
+import pygame
+from pgzero import ptext
+
+MARGIN = 10
+BAR_WIDTH = 200
+BAR_HEIGHT = 20
+BAR_GAP = 5
+
+
+def _centered(surface, center):
+    # same rounding as screen.draw.text(center=...)
+    return (
+        int(round(center[0] - 0.5 * surface.get_width())),
+        int(round(center[1] - 0.5 * surface.get_height())),
+    )
+
+
+class TextCache:
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self._surfaces = OrderedDict()
+
+    def get(self, text, fontsize, color):
+        key = (text, fontsize, color)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+        surface = ptext.getsurf(text, fontsize=fontsize, color=color, cache=False)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.capacity:
+            self._surfaces.popitem(last=False)  # least recently used
+        return surface
+
+    def __len__(self):
+        return len(self._surfaces)
+
+
+def _copy_in(dest, surface, pos):
+    # Straight copy onto a transparent area (a normal blit would blend the
+    # antialiased edges against transparent black and darken them).
+    dest.blit(surface, pos, special_flags=pygame.BLEND_RGBA_MAX)
+
+
+class Hud:
+    def __init__(self, width, max_health, text_cache=None):
+        self.width = width
+        self.max_health = max_health
+        self.text = text_cache or TextCache()
+        self._hud_key = None
+        self._hud_surface = None
+        self._menus = {}
+        self._loading = None  # (fill, surface)
+        self.rebuilds = 0  # how often the strip was actually redrawn
+
+    def _build_strip(self, health_width, stamina_width, wave_count):
+        label = self.text.get(f"Wave: {wave_count}", 30, "white")
+        height = max(2 * BAR_HEIGHT + BAR_GAP, label.get_height())
+        strip = pygame.Surface((self.width - 2 * MARGIN, height), pygame.SRCALPHA)
+        _copy_in(strip, label, (0, 0))
+        x = strip.get_width() - BAR_WIDTH
+        white = pygame.Color("white")
+        pygame.draw.rect(strip, white, pygame.Rect((x, 0), (BAR_WIDTH, BAR_HEIGHT)), 1)
+        pygame.draw.rect(
+            strip, pygame.Color("green"), pygame.Rect((x, 0), (health_width, BAR_HEIGHT)), 0
+        )
+        stamina_y = BAR_HEIGHT + BAR_GAP
+        pygame.draw.rect(
+            strip, white, pygame.Rect((x, stamina_y), (BAR_WIDTH, BAR_HEIGHT)), 1
+        )
+        pygame.draw.rect(
+            strip,
+            pygame.Color("blue"),
+            pygame.Rect((x, stamina_y), (stamina_width, BAR_HEIGHT)),
+            0,
+        )
+        self.rebuilds += 1
+        return strip
+
+    def layers(self, hero, wave_count, target_rect):
+        # [(key, surface, topleft)] for the dirty-rect renderer (render.py).
+        health_width = int((hero.health / self.max_health) * BAR_WIDTH)
+        stamina_width = int((hero.stamina / hero.max_stamina) * BAR_WIDTH)
+        key = (health_width, stamina_width, wave_count)
+        if key != self._hud_key:
+            self._hud_surface = self._build_strip(*key)
+            self._hud_key = key
+        layers = [("hud", self._hud_surface, (MARGIN, MARGIN))]
+        if not hero.alive:
+            surface = self.text.get("GAME OVER", 60, "red")
+            layers.append(("game_over", surface, _centered(surface, target_rect.center)))
+        return layers
+
+    def draw(self, target, hero, wave_count):
+        for _, surface, pos in self.layers(hero, wave_count, target.get_rect()):
+            target.blit(surface, pos)
+
+    def blit_text(self, target, text, fontsize, color, topleft=None, center=None):
+        surface = self.text.get(text, fontsize, color)
+        if center is not None:
+            topleft = _centered(surface, center)
+        target.blit(surface, topleft)
+
+    def menu_layer(self, buttons):
+        # buttons: [(rect, label), ...] -> (key, surface, topleft)
+        key = tuple((tuple(rect), label) for rect, label in buttons)
+        cached = self._menus.get(key)
+        if cached is None:
+            area = pygame.Rect(buttons[0][0]).unionall([pygame.Rect(r) for r, _ in buttons])
+            surface = pygame.Surface(area.size, pygame.SRCALPHA)
+            for rect, label in buttons:
+                local = pygame.Rect(rect).move(-area.x, -area.y)
+                pygame.draw.rect(surface, pygame.Color("gray"), local, 0)
+                pygame.draw.rect(surface, pygame.Color("white"), local, 1)
+                self.blit_text(surface, label, 30, "white", center=local.center)
+            cached = self._menus[key] = ("menu", surface, area.topleft)
+        return cached
+
+    def loading_layer(self, progress, center):
+        # Progress bar for the preloader, under the menu; rebuilt per pixel of progress.
+        fill = int(progress * BAR_WIDTH)
+        if self._loading is None or self._loading[0] != fill:
+            label = self.text.get("Loading...", 20, "white")
+            surface = pygame.Surface((BAR_WIDTH, label.get_height() + BAR_GAP + 8), pygame.SRCALPHA)
+            _copy_in(surface, label, ((BAR_WIDTH - label.get_width()) // 2, 0))
+            bar = pygame.Rect((0, label.get_height() + BAR_GAP), (BAR_WIDTH, 8))
+            pygame.draw.rect(surface, pygame.Color("white"), bar, 1)
+            inner = pygame.Rect((bar.x + 2, bar.y + 2), (max(fill - 4, 0), bar.h - 4))
+            pygame.draw.rect(surface, pygame.Color("white"), inner, 0)
+            self._loading = (fill, surface)
+        surface = self._loading[1]
+        return ("loading", surface, _centered(surface, center))
+
+    def draw_menu(self, target, buttons):
+        _, surface, pos = self.menu_layer(buttons)
+        target.blit(surface, pos)
@@ -0,0 +1,90 @@
+# Loading everything up front, while the menu is showing.
+#
+# Jobs come in two kinds. Threaded ones (decoding sounds) run one after another
+# on a worker thread. The rest touch pygame surfaces and stay on the main
+# thread: step() runs as many as fit in a small time budget each frame.
+# finish() blocks until every job is done, so anything that must not decode
+# during play can wait for it.
+import queue
+import threading
+import time
+from collections import deque
+
+import eventlog
+
+assets_log = eventlog.channel("assets")
+
+
+class Preloader:
+    def __init__(self):
+        self._main = deque()  # (label, fn)
+        self._threaded = []  # (label, fn)
+        self._results = queue.SimpleQueue()  # (label, error) from the worker
+        self._thread = None
+        self._waiting = 0  # threaded jobs whose result hasn't been handled yet
+        self.total = 0
+        self.done = 0
+        self.current = None  # label of the last job run, for the curious
+
+    def add(self, label, fn, threaded=False):
+        self.total += 1
+        if threaded:
+            self._threaded.append((label, fn))
+            self._waiting += 1
+        else:
+            self._main.append((label, fn))
+
+    def start(self):
+        if self._thread is None and self._threaded:
+            self._thread = threading.Thread(target=self._work, name="preload", daemon=True)
+            self._thread.start()
+
+    def _work(self):
+        for label, fn in self._threaded:
+            try:
+                fn()
+                self._results.put((label, None))
+            except Exception as e:
+                self._results.put((label, e))
+
+    def _handle(self, label, error):
+        self._waiting -= 1
+        self.current = label
+        if error is not None:
+            assets_log.warning("Preloading {label} failed: {error}", label=label, error=str(error))
+        self.done += 1
+
+    def step(self, budget_ms=4.0):
+        # Does main-thread work for up to budget_ms; returns True once all is loaded.
+        self.start()
+        deadline = time.perf_counter() + budget_ms / 1000.0
+        while time.perf_counter() < deadline:
+            try:
+                self._handle(*self._results.get_nowait())
+            except queue.Empty:
+                if not self._main:
+                    break
+                label, fn = self._main.popleft()
+                self.current = label
+                fn()
+                self.done += 1
+        return self.finished
+
+    def finish(self):
+        # Everything, now (blocking on the worker if it's still going).
+        self.start()
+        while self._main:
+            label, fn = self._main.popleft()
+            self.current = label
+            fn()
+            self.done += 1
+        while self._waiting:
+            self._handle(*self._results.get())
+
+    @property
+    def finished(self):
+        return self.done >= self.total
+
+    @property
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
@@ -0,0 +1,162 @@
+# Tiny frame profiler.
+#
+# Code calls start() when a frame (or a chunk of it) begins and mark("phase")
+# each time a phase ends – the time since the previous mark goes to that phase.
+# end_frame() commits the frame. We keep a rolling window per phase/counter for
+# the overlay (min / mean / p99) plus session totals and a coarse history so a
+# long session can be dumped to JSON or CSV and compared against another build.
+import csv
+import json
+import math
+import time
+from collections import deque
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[max(index, 0)]
+
+
+class _Series:
+    __slots__ = ("window", "count", "total", "low", "high")
+
+    def __init__(self, window):
+        self.window = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.low = math.inf
+        self.high = -math.inf
+
+    def add(self, value):
+        self.window.append(value)
+        self.count += 1
+        self.total += value
+        if value < self.low:
+            self.low = value
+        if value > self.high:
+            self.high = value
+
+    def rolling(self):
+        values = sorted(self.window)
+        if not values:
+            return {"min": 0.0, "mean": 0.0, "p99": 0.0}
+        return {
+            "min": values[0],
+            "mean": sum(values) / len(values),
+            "p99": _percentile(values, 99),
+        }
+
+    def session(self):
+        return {
+            "samples": self.count,
+            "min": self.low if self.count else 0.0,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.high if self.count else 0.0,
+        }
+
+
+class FrameProfiler:
+    def __init__(self, window=300, clock=time.perf_counter):
+        self.window = window
+        self.clock = clock
+        self.phases = {}  # name -> _Series of milliseconds, in first-seen order
+        self.counters = {}  # name -> _Series of per-frame values
+        self.history = []  # one rolling snapshot every `window` frames
+        self.frames = 0
+        self._pending = {}
+        self._pending_counts = {}
+        self._last = None
+        self._last_frame = None
+
+    def start(self):
+        self._last = self.clock()
+
+    def mark(self, phase):
+        now = self.clock()
+        if self._last is not None:
+            elapsed = (now - self._last) * 1000.0
+            self._pending[phase] = self._pending.get(phase, 0.0) + elapsed
+        self._last = now
+
+    def count(self, name, value):
+        self._pending_counts[name] = value
+
+    def end_frame(self):
+        now = self.clock()
+        if self._last_frame is not None:
+            self._pending["frame"] = (now - self._last_frame) * 1000.0
+        self._last_frame = now
+        for phase, elapsed in self._pending.items():
+            series = self.phases.get(phase)
+            if series is None:
+                series = self.phases[phase] = _Series(self.window)
+            series.add(elapsed)
+        for name, value in self._pending_counts.items():
+            series = self.counters.get(name)
+            if series is None:
+                series = self.counters[name] = _Series(self.window)
+            series.add(value)
+        self._pending.clear()
+        self._pending_counts.clear()
+        self._last = None
+        self.frames += 1
+        if self.frames % self.window == 0:
+            self.history.append({"frame": self.frames, **self.rolling()})
+
+    def rolling(self):
+        return {
+            "phases": {name: s.rolling() for name, s in self.phases.items()},
+            "counters": {name: s.rolling() for name, s in self.counters.items()},
+        }
+
+    def overlay_lines(self):
+        lines = []
+        for name, series in self.phases.items():
+            stats = series.rolling()
+            lines.append(
+                f"{name:<10} {stats['min']:6.2f} {stats['mean']:6.2f} {stats['p99']:6.2f} ms"
+            )
+        for name, series in self.counters.items():
+            stats = series.rolling()
+            lines.append(f"{name:<10} {stats['mean']:6.1f} (max {max(series.window):g})")
+        return lines
+
+    def summary(self):
+        return {
+            "frames": self.frames,
+            "window": self.window,
+            "phases": {name: s.session() for name, s in self.phases.items()},
+            "counters": {name: s.session() for name, s in self.counters.items()},
+        }
+
+    def dump(self, path):
+        # .csv gets one row per (snapshot, series); anything else gets JSON.
+        if path.lower().endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame", "kind", "name", "min", "mean", "p99", "max"])
+                for snapshot in self.history:
+                    for kind in ("phases", "counters"):
+                        for name, stats in snapshot[kind].items():
+                            writer.writerow(
+                                [
+                                    snapshot["frame"],
+                                    kind,
+                                    name,
+                                    stats["min"],
+                                    stats["mean"],
+                                    stats["p99"],
+                                    "",
+                                ]
+                            )
+                summary = self.summary()
+                for kind in ("phases", "counters"):
+                    for name, stats in summary[kind].items():
+                        writer.writerow(
+                            ["all", kind, name, stats["min"], stats["mean"], "", stats["max"]]
+                        )
+        else:
+            with open(path, "w") as f:
+                json.dump({"summary": self.summary(), "history": self.history}, f, indent=2)
@@ -0,0 +1,125 @@
+# Dirty-rectangle rendering.
+#
+# Instead of blitting the whole background and every sprite each frame, the
+# renderer remembers what it drew last frame (surface + rect per layer) and only
+# touches the places where something changed: the old and new rects of every
+# layer that moved, changed frame, appeared or went away. Those areas get the
+# background put back, then every layer overlapping them is redrawn (clipped, in
+# the same order), so the result is pixel-for-pixel what a full redraw would give.
+# Only those rects are pushed to the display.
+#
+# Layers entirely off the screen are dropped up front, and whatever does get
+# drawn goes out in one Surface.blits() call per area (the whole screen on a
+# full redraw) rather than a blit() per sprite.
+#
+# Anything drawn straight onto the screen behind the renderer's back (the F3
+# overlay) has to be reported with touch(), so it's presented this frame and
+# painted over next frame.
+import pygame
+
+_flip = pygame.display.flip
+
+# Past this share of the screen a full redraw is cheaper than lots of small ones.
+FULL_REDRAW_SHARE = 0.6
+
+
+def merge_rects(rects):
+    # Union overlapping rects until none overlap, so no pixel is redrawn twice.
+    merged = []
+    for rect in rects:
+        rect = pygame.Rect(rect)
+        i = rect.collidelist(merged)
+        while i != -1:
+            rect.union_ip(merged.pop(i))
+            i = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class DirtyRenderer:
+    def __init__(self, background, enabled=True):
+        self.background = background
+        self.enabled = enabled  # False: full redraw + flip every frame (the old way)
+        self._target = None
+        self._drawn = {}  # layer key -> (surface, rect) as drawn last frame
+        self._touched = []  # rects drawn over outside the renderer last frame
+        self._pending = None  # rects to present, None = whole screen
+        self._full = True
+        self.dirty_area = 0  # pixels redrawn last frame
+
+    def invalidate(self):
+        # Next frame repaints everything (e.g. the window got re-created).
+        self._full = True
+
+    def render(self, target, layers):
+        """
+        Draws one frame onto target. layers is a list of (key, surface, topleft)
+        in back-to-front order; the key identifies the same thing across frames
+        (the actor, "hud", ...).
+        """
+        screen_rect = target.get_rect()
+        current = {}
+        for key, surface, (x, y) in layers:
+            # blit() truncates float positions, Rect() would round them
+            rect = surface.get_rect(topleft=(int(x), int(y)))
+            if rect.colliderect(screen_rect):
+                current[key] = (surface, rect)
+
+        if target is not self._target:
+            self._target = target
+            self._full = True
+
+        dirty = None
+        if self.enabled and not self._full:
+            dirty = self._touched
+            drawn = self._drawn
+            for key, (surface, rect) in drawn.items():
+                now = current.get(key)
+                if now is None or now[0] is not surface or now[1] != rect:
+                    dirty.append(rect)
+            for key, (surface, rect) in current.items():
+                before = drawn.get(key)
+                if before is None or before[0] is not surface or before[1] != rect:
+                    dirty.append(rect)
+            dirty = merge_rects(r for r in (r.clip(screen_rect) for r in dirty) if r)
+            if sum(r.w * r.h for r in dirty) > FULL_REDRAW_SHARE * screen_rect.w * screen_rect.h:
+                dirty = None
+
+        if dirty is None:
+            batch = [(self.background, (0, 0))]
+            batch.extend(current.values())
+            target.blits(batch, doreturn=False)
+            self.dirty_area = screen_rect.w * screen_rect.h
+        else:
+            drawn = list(current.values())
+            rects = [rect for _, rect in drawn]
+            for area in dirty:
+                target.set_clip(area)
+                batch = [(self.background, area, area)]
+                batch.extend(drawn[i] for i in area.collidelistall(rects))
+                target.blits(batch, doreturn=False)
+            target.set_clip(None)
+            self.dirty_area = sum(r.w * r.h for r in dirty)
+
+        self._drawn = current
+        self._touched = []
+        self._pending = dirty
+        self._full = not self.enabled
+
+    def touch(self, rect):
+        rect = pygame.Rect(rect)
+        self._touched.append(rect)
+        if self._pending is not None:
+            self._pending.append(rect)
+
+    def present(self):
+        if self._pending is None:
+            _flip()
+        elif self._pending:
+            pygame.display.update(self._pending)
+        self._pending = []  # nothing new drawn until the next render()
+
+    def install(self):
+        # pgzero calls pygame.display.flip() right after draw(); route that
+        # through present() so only the dirty rects go out.
+        pygame.display.flip = self.present
@@ -0,0 +1,125 @@
+# Input recording + replay, so the same session can be run again bit for bit.
+#
+# A recording is the world's seed and starting wave, one byte of input per tick
+# (zlib squashes the long runs of "holding right" to almost nothing) and a hash
+# of the world state after the last tick. Replaying feeds the bytes back in
+# instead of the keyboard/mouse and checks the hash at the end – same hash, same
+# game, so two builds' frame times can be compared on identical work.
+#
+#     ROGUEBIRD_RECORD=run.rbr python game.py    # play, quit -> run.rbr
+#     ROGUEBIRD_REPLAY=run.rbr python game.py    # watch it again (and profile it)
+#     python sim.py --replay run.rbr             # or headless, as fast as possible
+import struct
+import zlib
+
+import eventlog
+
+MAGIC = b"RBRP"
+# 2: skeletons far from the hero think less often (sim.AI_NEAR)
+# 3: "edges" spawns spread over sim.EDGE_BAND
+VERSION = 3
+# magic, version, seed, starting wave, spawn mode, spawn_per_tick, ticks, state hash
+_HEADER = struct.Struct("<4sBQIBHI16s")
+SPAWN_MODES = ("drop", "edges")
+
+game_log = eventlog.channel("game")
+
+LEFT, RIGHT, DASH, ATTACK = 1, 2, 4, 8
+
+
+def pack_inputs(inputs):
+    return (
+        (LEFT if inputs.left else 0)
+        | (RIGHT if inputs.right else 0)
+        | (DASH if inputs.dash else 0)
+        | (ATTACK if inputs.attack else 0)
+    )
+
+
+def unpack_inputs(bits, inputs):
+    inputs.left = bool(bits & LEFT)
+    inputs.right = bool(bits & RIGHT)
+    inputs.dash = bool(bits & DASH)
+    inputs.attack = bool(bits & ATTACK)
+    return inputs
+
+
+class Recorder:
+    def __init__(self, world):
+        # Start recording before the world's first step; it needs an explicit seed.
+        if world.seed is None:
+            raise ValueError("Recording needs a World with a seed")
+        if not 0 <= world.seed < 2**64:
+            raise ValueError(f"Can't record seed {world.seed}: it has to fit in 0..2**64-1")
+        self.seed = world.seed
+        self.wave_count = world.wave_count
+        self.spawn_mode = world.spawn_mode
+        self.spawn_per_tick = world.spawn_per_tick
+        self.ticks = bytearray()
+
+    def record(self, inputs):
+        # Call once per world.step(), with the inputs that step gets.
+        self.ticks.append(pack_inputs(inputs))
+
+    def save(self, path, world):
+        header = _HEADER.pack(
+            MAGIC,
+            VERSION,
+            self.seed,
+            self.wave_count,
+            SPAWN_MODES.index(self.spawn_mode),
+            self.spawn_per_tick,
+            len(self.ticks),
+            world.state_hash(),
+        )
+        with open(path, "wb") as f:
+            f.write(header + zlib.compress(bytes(self.ticks), 9))
+        game_log.info("Recorded {ticks} ticks to {path}", ticks=len(self.ticks), path=path)
+
+
+class Replay:
+    def __init__(self, seed, wave_count, spawn_mode, spawn_per_tick, ticks, state_hash):
+        self.seed = seed
+        self.wave_count = wave_count
+        self.spawn_mode = spawn_mode
+        self.spawn_per_tick = spawn_per_tick
+        self.ticks = ticks
+        self.state_hash = state_hash
+        self.position = 0
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, seed, wave_count, mode, spawn_per_tick, count, state_hash = (
+            _HEADER.unpack_from(data)
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a replay this build can read")
+        ticks = zlib.decompress(data[_HEADER.size :])
+        if len(ticks) != count:
+            raise ValueError(f"{path} is truncated ({len(ticks)} of {count} ticks)")
+        return cls(seed, wave_count, SPAWN_MODES[mode], spawn_per_tick, ticks, state_hash)
+
+    def world_options(self):
+        # World(...) keyword arguments that reproduce the recorded session.
+        return {
+            "seed": self.seed,
+            "wave_count": self.wave_count,
+            "spawn_mode": self.spawn_mode,
+            "spawn_per_tick": self.spawn_per_tick,
+            "spawn_budget_ms": None,  # time-based, would break determinism
+        }
+
+    @property
+    def finished(self):
+        return self.position >= len(self.ticks)
+
+    def next_inputs(self, inputs):
+        unpack_inputs(self.ticks[self.position], inputs)
+        self.position += 1
+        return inputs
+
+    def verify(self, world):
+        # True if the world ended up exactly where the recording did.
+        return world.state_hash() == self.state_hash
@@ -0,0 +1,1060 @@
+# The game rules without the game window.
+#
+# Everything that decides what happens in a tick (hero, skeletons, waves) lives
+# here and never imports pgzero, so the same code runs inside game.py at 60 FPS
+# or headless as fast as the CPU allows:
+#
+#     python sim.py --ticks 100000 --wave 20 --quiet
+#
+# game.py plugs in an audio.VoiceManager around the pgzero sound loader and
+# draws World.sprites(); headless runs get silence.
+import argparse
+import contextlib
+import hashlib
+import heapq
+import itertools
+import math
+import operator
+import random
+import time
+
+import eventlog
+from animation import Animation, get_clip
+from profiler import FrameProfiler
+from replay import Recorder, Replay
+from spatial import FloorGrid
+
+animation_log = eventlog.channel("animation")
+combat_log = eventlog.channel("combat")
+sound_log = eventlog.channel("sound")
+wave_log = eventlog.channel("wave")
+
+# Wndow size set to match our bg masterpiece (928 x 335)
+WIDTH = 928
+HEIGHT = 335
+GAME_FLOOR = 255  # Floor lvl where our chars stand
+# Note to self: Skeleton asset is a bit shorter than knight, so adjust Y a bit.
+ENEMY_Y = GAME_FLOOR + 23
+EDGE_OFFSET = 30  # how far off screen skeletons start in "edges" spawn mode
+EDGE_BAND = 200  # ...spread over this much beyond each edge
+
+# Every duration and speed in here counts ticks, and there are always this many
+# a second – game.py runs the rules on a fixed timestep (timestep.py).
+TICK_RATE = 60
+
+# Basic stats – nothing fancy
+MAX_HERO_HEALTH = 100
+MAX_ENEMY_HEALTH = 50
+
+# Skeleton tuning (enemy_engine.py plays by these too)
+ATTACK_RANGE = 50
+ENEMY_DAMAGE = 20
+KNOCKBACK = 10
+ENEMY_ATTACK_COOLDOWN = 60
+INTERRUPT_COOLDOWN = 30  # after the hero cuts an attack short
+RUN_PRIORITY = 5
+
+# AI level of detail. A skeleton within AI_NEAR of the hero thinks every tick;
+# further out it thinks every AI_FAR_EVERY ticks and catches up on the ones it
+# skipped in one go – all it does out there is walk, so that's the same walk in
+# fewer, bigger steps. AI_NEAR is the attack range plus more than a dash covers
+# in AI_FAR_EVERY ticks, so nothing gets within reach between two looks.
+AI_NEAR = 200
+AI_FAR_EVERY = 8
+
+_by_slot = operator.attrgetter("slot")
+
+
+# Where a character is. Drawing goes by World.sprites(), so that's all it needs.
+class Body:
+    __slots__ = ("x", "y")
+
+    def __init__(self, pos=(0, 0)):
+        self.x, self.y = pos
+
+    @property
+    def pos(self):
+        return self.x, self.y
+
+    @pos.setter
+    def pos(self, pos):
+        self.x, self.y = pos
+
+
+# Everything the player can do in one tick. game.py fills it from the keyboard/mouse,
+# headless runs fill it from a script or a bot.
+class InputState:
+    __slots__ = ("left", "right", "dash", "attack")
+
+    def __init__(self, left=False, right=False, dash=False, attack=False):
+        self.left = left
+        self.right = right
+        self.dash = dash
+        self.attack = attack
+
+    def clear(self):
+        self.left = self.right = self.dash = self.attack = False
+
+
+NO_INPUT = InputState()
+
+
+# Base class for all our characters (hero and baddies)
+class Character:
+    __slots__ = (
+        "name",
+        "world",
+        "health",
+        "alive",
+        "pos",
+        "actor",
+        "orientation",
+        "idle_animation",
+        "action_animation",
+        "animation_queue",
+        "current_animation",
+        "current_sound",
+        "idle_since",
+        "idle_elapsed",
+        "hold_frame",
+    )
+
+    def __init__(self, name, pos=(WIDTH // 2, HEIGHT // 2), world=None):
+        self.name = name
+        self.world = world
+        self.health = MAX_HERO_HEALTH  # Default hero health; enemies will override
+        self.alive = True
+        self.pos = pos
+        self.actor = Body(pos)
+        self.orientation = "right"  # Could be "left" too
+        idle_clip = get_clip(
+            name,
+            "idle",
+            tick_delay=10,
+            retain_last_frame=True,
+            loop=True,
+            priority=0,
+            fallback_frames=(name,),
+        )
+        now = self.now()
+        self.idle_animation = Animation(idle_clip, now)
+        # One reusable timeline for run/attack/death/dash – switching clips just restarts it.
+        self.action_animation = Animation()
+        self.animation_queue = []
+        self.current_animation = None
+        self.current_sound = None
+        # Idle only runs while there's no action clip. It picks up where it left
+        # off, so it keeps track of the ticks it has already played (idle_elapsed)
+        # and shows from idle_since on.
+        self.idle_since = now
+        self.idle_elapsed = 0
+        self.hold_frame = name  # shown when nothing else is (before idle starts, once dead)
+
+    def now(self):
+        # The tick being played (or, between steps, the next one).
+        return self.world.tick_count if self.world is not None else 0
+
+    def play_animation_sound(self, animation):
+        sounds = self.world.sounds if self.world else None
+        if sounds is None:
+            return  # headless – nothing to hear
+        # Sounds need a lot of tune
+        base_anim = (
+            animation.animation_name.rsplit("_", 1)[0]
+            if animation.animation_name.endswith("_right")
+            or animation.animation_name.endswith("_left")
+            else animation.animation_name
+        )
+        sound_name = f"{self.name}_{base_anim}"
+        looped = animation.animation_name.startswith("run_")
+        current = self.current_sound
+        if (
+            looped
+            and current is not None
+            and current.name == sound_name
+            and sounds.playing(current)
+        ):
+            return  # turning around mid-run – keep the footsteps going
+        self.stop_current_sound()
+        if sounds.handle(sound_name) is None:
+            if sound_log.verbose:
+                sound_log.debug("No sound found for: {sound}", sound=sound_name)
+            return
+        # audio.VoiceManager decides whether this gets a channel of its own
+        self.current_sound = sounds.play(sound_name, loops=-1 if looped else 0)
+        if self.current_sound is not None:
+            self.world.sounds_started += 1
+            if sound_log.verbose:
+                sound_log.debug("Playing sound: {sound}", sound=sound_name)
+
+    def stop_current_sound(self):
+        if self.current_sound:
+            self.world.sounds.stop(self.current_sound)
+            self.current_sound = None
+
+    def set_animation(self, clip):
+        now = self.now()
+        if self.current_animation is None:
+            # idle pauses here – count what it got through since it (re)started
+            self.idle_elapsed = max(now, self.idle_since) - self.idle_animation.start
+        self._play(clip, now)
+
+    def _play(self, clip, start):
+        if not clip.frames:
+            self.hold_frame = self.frame_at(start - 1)  # nothing to show – keep what's up
+        self.current_animation = self.action_animation.play(clip, start)
+        if self.world is not None:
+            self.world.animation_switches += 1
+            end = self.current_animation.end
+            if end is not None:
+                self.world.schedule_finish(self, end)
+        self.play_animation_sound(self.current_animation)
+
+    def _resume(self, tick):
+        # After an action clip: the next queued one, or idle from where it paused.
+        if self.animation_queue:
+            self._play(self.animation_queue.pop(0), tick)
+        else:
+            self.idle_since = tick
+            self.idle_animation.start = tick - self.idle_elapsed
+
+    def cancel_animation(self):
+        # Drop the action clip; idle is back on this very tick.
+        if self.current_animation is not None:
+            self.current_animation = None
+            self._resume(self.now())
+
+    def finish_animation(self, tick):
+        # A one-shot clip played its last frame on tick (World schedules this).
+        animation = self.current_animation
+        if animation_log.verbose:
+            animation_log.debug(
+                "{name} finished {animation}", name=self.name, animation=animation.animation_name
+            )
+        self.hold_frame = animation.frame_at(tick) or self.hold_frame
+        self.stop_current_sound()
+        self.current_animation = None
+        self._resume(tick + 1)
+
+    def run(self):
+        if self.current_animation and self.current_animation.priority > RUN_PRIORITY:
+            return
+        desired_animation = f"run_{self.orientation}"
+        if (
+            self.current_animation
+            and self.current_animation.animation_name == desired_animation
+        ):
+            return
+        self.animation_queue.clear()
+        new_clip = get_clip(
+            self.name,
+            desired_animation,
+            tick_delay=3,
+            retain_last_frame=False,
+            loop=True,
+            priority=RUN_PRIORITY,
+        )
+        self.set_animation(new_clip)
+        if animation_log.verbose:
+            animation_log.debug(
+                "{name} is now running with {animation}", name=self.name, animation=desired_animation
+            )
+
+    def attack(self):
+        # Always show the attack animation even if no enemy is hit.
+        attack_priority = 10
+        desired_animation = f"attack1_{self.orientation}"
+        self.animation_queue.clear()
+        new_clip = get_clip(
+            self.name,
+            desired_animation,
+            tick_delay=5,
+            retain_last_frame=True,
+            loop=False,
+            priority=attack_priority,
+        )
+        self.set_animation(new_clip)
+        if combat_log.verbose:
+            combat_log.debug(
+                "{name} attacks with {animation}", name=self.name, animation=desired_animation
+            )
+
+    def die(self):
+        if not self.alive:
+            return
+        self.alive = False
+        self.animation_queue.clear()
+        self.stop_current_sound()
+        death_clip = get_clip(
+            self.name,
+            "death",
+            tick_delay=10,
+            retain_last_frame=True,
+            loop=False,
+            priority=10,
+        )
+        self.set_animation(death_clip)
+        if combat_log.verbose:
+            combat_log.debug("{name} is dying...", name=self.name)
+
+    def frame_at(self, tick):
+        # Image to show on tick – worked out on demand, nothing is stepped per tick.
+        animation = self.current_animation
+        if animation is not None:
+            return animation.frame_at(tick) or self.hold_frame
+        if self.alive and tick >= self.idle_since:
+            return self.idle_animation.frame_at(tick)
+        return self.hold_frame
+
+
+# Enemy subclass (skeleton) – simple, but it gets the job done.
+class Enemy(Character):
+    __slots__ = ("attack_cooldown", "attacking", "slot", "ai_tick", "ai_step")
+
+    def __init__(self, name, pos=(WIDTH // 2, HEIGHT // 2), world=None):
+        super().__init__(name, pos, world)
+        self.health = MAX_ENEMY_HEALTH
+        self.attack_cooldown = 0  # Time until next attack
+        self.attacking = False
+        self.slot = 0  # spawn order within the wave
+        # 1: thinks every tick; AI_FAR_EVERY: far off, thinks on ai_tick
+        # (World.think); 0: dead
+        self.ai_step = 1
+        self.ai_tick = self.now()
+
+    def reset(self, pos):
+        # Bring a skeleton from an earlier wave back as if it were brand new,
+        # keeping its actor and animation cursors (World.spawn_wave pools them).
+        self.health = MAX_ENEMY_HEALTH
+        self.alive = True
+        self.pos = pos
+        self.orientation = "right"
+        self.actor.pos = pos
+        now = self.now()
+        self.idle_animation.play(self.idle_animation.clip, now)
+        self.idle_since = now
+        self.idle_elapsed = 0
+        self.hold_frame = self.name
+        self.animation_queue.clear()
+        self.current_animation = None
+        # A death rattle from last wave can finish on its own; the voice manager
+        # reclaims the channel once it's done.
+        self.current_sound = None
+        self.attack_cooldown = 0
+        self.attacking = False
+        self.ai_step = 1
+        self.ai_tick = now
+
+    def shift(self, dx):
+        # Every skeleton move goes through here so the floor grid stays in sync.
+        old_x = self.actor.x
+        self.actor.x = old_x + dx
+        if self.world is not None:
+            self.world.enemy_grid.move(self, old_x, self.actor.x)
+
+    def die(self):
+        if self.alive and self.world is not None:
+            self.world.enemy_grid.remove(self, self.actor.x)
+        self.ai_step = 0
+        super().die()
+
+    def attack(self):
+        attack_priority = 10
+        desired_animation = f"attack_{self.orientation}"
+        self.animation_queue.clear()
+        new_clip = get_clip(
+            self.name,
+            desired_animation,
+            tick_delay=5,
+            retain_last_frame=True,
+            loop=False,
+            priority=attack_priority,
+        )
+        self.set_animation(new_clip)
+        if combat_log.verbose:
+            combat_log.debug(
+                "{name} attacks with {animation}", name=self.name, animation=desired_animation
+            )
+        # Damage is applied after the animation finishes.
+
+    def interrupt_attack(self):
+        if self.attacking:
+            if combat_log.verbose:
+                combat_log.debug(
+                    "{name}'s attack got interrupted by the hero (eat that?)", name=self.name
+                )
+            self.attacking = False
+            self.animation_queue.clear()
+            if (
+                self.current_animation
+                and self.current_animation.animation_name.startswith("attack")
+            ):
+                self.cancel_animation()
+            self.attack_cooldown = INTERRUPT_COOLDOWN
+
+    def update_ai(self, target):
+        # One tick's thinking – or, far from the hero, the ai_step ticks since
+        # the last time in one go.
+        if not self.alive or not target.alive:
+            return
+        ticks = self.ai_step
+        if ticks > 1:
+            if abs(self.actor.x - target.actor.x) <= AI_NEAR:
+                self.ai_step = 1  # close enough again: every tick from the next one
+            else:
+                self.ai_tick += ticks
+        if self.attack_cooldown > ticks:
+            self.attack_cooldown -= ticks
+        elif self.attack_cooldown > 0:
+            self.attack_cooldown = 0
+        if self.attacking and not self.current_animation:
+            if abs(self.actor.x - target.actor.x) <= ATTACK_RANGE:
+                target.health -= ENEMY_DAMAGE
+                if self.orientation == "right":
+                    target.actor.x -= KNOCKBACK
+                else:
+                    target.actor.x += KNOCKBACK
+                if combat_log.verbose:
+                    combat_log.debug(
+                        "{name} hit {target} for {damage} HP!",
+                        name=self.name,
+                        target=target.name,
+                        damage=ENEMY_DAMAGE,
+                    )
+                if target.health <= 0:
+                    target.die()
+            else:
+                if combat_log.verbose:
+                    combat_log.debug("{name}'s attack missed", name=self.name)
+            self.attacking = False
+            self.attack_cooldown = ENEMY_ATTACK_COOLDOWN
+            return
+        if not self.attacking:
+            distance = abs(self.actor.x - target.actor.x)
+            if distance > ATTACK_RANGE:
+                if ticks == 1 and distance > AI_NEAR:
+                    # left behind (dashed past, knocked away): coarse from here on
+                    self.ai_step = AI_FAR_EVERY
+                    self.ai_tick = self.now() + AI_FAR_EVERY
+                # a pixel a tick, never walking into range on a catch-up step
+                steps = min(ticks, math.ceil(distance - ATTACK_RANGE))
+                if self.actor.x < target.actor.x:
+                    self.orientation = "right"
+                    self.shift(steps)
+                else:
+                    self.orientation = "left"
+                    self.shift(-steps)
+                self.run()
+            else:
+                if self.attack_cooldown == 0:
+                    self.attacking = True
+                    self.attack()
+
+
+# Our hero (knight) – dashing, attacking, and just plain cool.
+class Hero(Character):
+    __slots__ = (
+        "stamina",
+        "max_stamina",
+        "dash_cooldown",
+        "is_dashing",
+        "dash_start_x",
+        "dash_target_x",
+        "dash_duration",
+        "dash_timer",
+    )
+
+    def __init__(self, name, pos=(WIDTH // 2, HEIGHT // 2), world=None):
+        super().__init__(name, pos, world)
+        self.stamina = 100
+        self.max_stamina = 100
+        self.dash_cooldown = 0  # Frames before another dash is allowed
+        self.is_dashing = False
+        self.dash_start_x = 0
+        self.dash_target_x = 0
+        self.dash_duration = 10  # Dash lasts 10 frames – blink and you'll miss it!
+        self.dash_timer = 0
+
+    def attack(self):
+        # Always show the attack animation even if no enemy is hit.
+        attack_cost = 20
+        if self.stamina < attack_cost:
+            if combat_log.verbose:
+                combat_log.debug("Not enough stamina to attack")
+            return
+        self.stamina -= attack_cost
+        super().attack()
+        attack_range = 50
+        damage = 20
+        knockback_amount = 10
+        target = self.world.nearest_enemy(
+            self.actor.x, self.orientation, reach=attack_range
+        )
+        if target:
+            target.health -= damage
+            if self.orientation == "right":
+                target.shift(knockback_amount)
+            else:
+                target.shift(-knockback_amount)
+            if combat_log.verbose:
+                combat_log.debug(
+                    "{name} hit {target} for {damage} HP with a  knockback!",
+                    name=self.name,
+                    target=target.name,
+                    damage=damage,
+                )
+            if target.health <= 0:
+                target.die()
+            if target.attacking:
+                target.interrupt_attack()
+
+    def dash(self):
+        # Dash consumes stamina – gotta spend some energy to be fast!
+        dash_cost = 20
+        if self.dash_cooldown > 0 or self.is_dashing or self.stamina < dash_cost:
+            return
+        self.stamina -= dash_cost
+        dash_distance = 150
+        self.dash_start_x = self.actor.x
+        self.dash_target_x = (
+            self.actor.x + dash_distance
+            if self.orientation == "right"
+            else self.actor.x - dash_distance
+        )
+        self.dash_duration = 10  # A quick burst over 10 frames
+        self.dash_timer = 0
+        self.is_dashing = True
+        desired_animation = f"dash_{self.orientation}"
+        self.animation_queue.clear()
+        # Set the dash animation to loop only during the dash period.
+        dash_clip = get_clip(
+            self.name,
+            desired_animation,
+            tick_delay=3,
+            retain_last_frame=False,
+            loop=True,
+            priority=15,
+        )
+        self.set_animation(dash_clip)
+        if combat_log.verbose:
+            combat_log.debug(
+                "{name} started a dash to the {direction}", name=self.name, direction=self.orientation
+            )
+
+
+class World:
+    # enemy_backend: "objects" (one Enemy per skeleton) or "numpy" (enemy_engine.py,
+    # needs numpy – worth it once waves get into the dozens).
+    # spawn_mode: "drop" (skeletons appear on the floor away from the hero) or
+    # "edges" (they walk in from both sides of the screen). At most spawn_per_tick
+    # arrive per tick; spawn_budget_ms additionally caps the time spent on it (that
+    # one depends on the machine, so leave it off where runs must be repeatable).
+    def __init__(
+        self,
+        seed=None,
+        wave_count=1,
+        sounds=None,
+        enemy_backend="objects",
+        spawn_mode="drop",
+        spawn_per_tick=8,
+        spawn_budget_ms=None,
+    ):
+        self.sounds = sounds
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.wave_count = wave_count
+        self.tick_count = 0
+        # Optional profiler.FrameProfiler – step() reports its phases to it.
+        self.profiler = None
+        self.animation_switches = 0
+        self.sounds_started = 0
+        self.engine = None
+        self.enemy_grid = FloorGrid(cell_size=50)  # living skeletons by x (object backend)
+        self._enemy_pool = []  # every Enemy ever spawned, reused wave after wave
+        # one-shot clips still to finish: (tick, spawn slot, seq, character, plays)
+        self._hero_finishes = []
+        self._enemy_finishes = []
+        self._finish_seq = itertools.count()
+        # skeletons thinking every tick, in spawn order, and tick -> the far
+        # ones thinking then (object backend)
+        self._ai_near = []
+        self._ai_far = {}
+        if spawn_mode not in ("drop", "edges"):
+            raise ValueError(f"Unknown spawn mode: {spawn_mode!r}")
+        self.spawn_mode = spawn_mode
+        self.spawn_per_tick = spawn_per_tick
+        self.spawn_budget_ms = spawn_budget_ms
+        self.spawns_left = 0  # skeletons of the current wave still to come
+        if enemy_backend == "numpy":
+            from enemy_engine import EnemyEngine
+
+            self.engine = EnemyEngine(self)
+        elif enemy_backend != "objects":
+            raise ValueError(f"Unknown enemy backend: {enemy_backend!r}")
+        # Create our hero (Named Niyazi) and spawn the first wave
+        self.hero = Hero("knight", pos=(WIDTH // 2, GAME_FLOOR), world=self)
+        self.enemies = []
+        self.spawn_wave()
+
+    def spawn_wave(self):
+        # Starts the next wave. The skeletons themselves trickle in a batch per
+        # tick (spawn_pending()), so a huge wave doesn't land in a single frame.
+        self.enemies.clear()  # Clear out last wave's corpses – maybe remove this so you can see the carnage?
+        # (they go back into the pool and get reused for this wave)
+        num_enemies = 2 * self.wave_count  # Wave 1: 2 baddies, wave 2: 4, etc.
+        wave_log.info(
+            "Spawning wave {wave} with {count} enemies", wave=self.wave_count, count=num_enemies
+        )
+        self.spawns_left = num_enemies
+        if self.engine is not None:
+            self.engine.spawn((), ENEMY_Y, MAX_ENEMY_HEALTH)
+        else:
+            self.enemy_grid.clear()
+            self._ai_near = []
+            self._ai_far.clear()
+        self.spawn_pending()
+
+    def spawn_spot(self):
+        # Somewhere on the floor at least 100 px from the hero (avoid insta hugs),
+        # drawn straight from the allowed stretches instead of retrying until
+        # a random x happens to land far enough away.
+        if self.spawn_mode == "edges":
+            # walk in from off screen – anywhere in a band past either edge, so
+            # a big wave comes on as a crowd rather than two stacks
+            pick = self.rng.randrange(2 * EDGE_BAND)
+            if pick < EDGE_BAND:
+                return -EDGE_OFFSET - pick
+            return WIDTH + EDGE_OFFSET + pick - EDGE_BAND
+        low, high = 50, WIDTH - 50
+        hero_x = self.hero.actor.x
+        left_end = min(math.floor(hero_x - 100), high)  # [low, left_end]
+        right_start = max(math.ceil(hero_x + 100), low)  # [right_start, high]
+        left = max(left_end - low + 1, 0)
+        right = max(high - right_start + 1, 0)
+        if not left + right:
+            return self.rng.randint(low, high)  # nowhere is far enough – anywhere, then
+        pick = self.rng.randrange(left + right)
+        return low + pick if pick < left else right_start + pick - left
+
+    def spawn_pending(self):
+        # Brings in up to spawn_per_tick of the wave's remaining skeletons (fewer
+        # if spawn_budget_ms runs out first – checked after each one is made,
+        # since making them is what takes the time).
+        count = min(self.spawns_left, self.spawn_per_tick)
+        if not count:
+            return
+        budget = self.spawn_budget_ms
+        deadline = time.perf_counter() + budget / 1000.0 if budget else None
+        enemies = self.enemies
+        first = len(enemies)
+        engine = self.engine
+        if engine is not None and deadline is None:
+            # nothing to stop for: the whole batch in one go
+            engine.add([self.spawn_spot() for _ in range(count)], MAX_ENEMY_HEALTH)
+            enemies.extend(engine.views(first))
+            self.spawns_left -= count
+            return
+        for slot in range(first, first + count):
+            x = self.spawn_spot()
+            if engine is not None:
+                engine.add((x,), MAX_ENEMY_HEALTH)
+                enemies.extend(engine.views(slot))
+            else:
+                enemy = self.pooled_enemy(slot, x)
+                enemies.append(enemy)
+                self.enemy_grid.insert(enemy, enemy.actor.x)
+                self._ai_near.append(enemy)
+            self.spawns_left -= 1
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+    def pooled_enemy(self, slot, x):
+        # A fresh skeleton for a spawn slot: last wave's one, reset, if there was one.
+        pool = self._enemy_pool
+        if slot < len(pool):
+            enemy = pool[slot]
+            enemy.reset((x, ENEMY_Y))
+        else:
+            enemy = Enemy("skeleton", pos=(x, ENEMY_Y), world=self)
+            pool.append(enemy)
+        enemy.slot = slot
+        return enemy
+
+    def nearest_enemy(self, x, orientation=None, reach=None):
+        # Closest living skeleton to x; with an orientation only the ones strictly in
+        # front count, with a reach only the ones at most that far away.
+        if self.engine is not None:
+            return self.engine.nearest(x, orientation, reach)
+        return self.enemy_grid.nearest(x, orientation, reach)
+
+    def enemies_within(self, x, reach):
+        # Living skeletons at most reach away from x (area attacks and the like).
+        if self.engine is not None:
+            return self.engine.within(x, reach)
+        return self.enemy_grid.within(x, reach)
+
+    def enemies_alive(self):
+        if self.engine is not None:
+            return int(self.engine.alive.sum())
+        return len(self.enemy_grid)  # the grid only holds the living
+
+    def any_enemy_alive(self):
+        if self.engine is not None:
+            return self.engine.any_alive()
+        return any(enemy.alive for enemy in self.enemies)
+
+    def sprites(self):
+        # What to draw: (key, image name, x, y)
+        # for the hero, then the skeletons, as of the last tick stepped. The key
+        # stays the same for the same character from frame to frame.
+        tick = self.tick_count - 1
+        hero = self.hero
+        sprites = [(hero, hero.frame_at(tick), hero.actor.x, hero.actor.y)]
+        if self.engine is not None:
+            sprites.extend(self.engine.sprites())
+        else:
+            for enemy in self.enemies:
+                actor = enemy.actor
+                sprites.append((enemy, enemy.frame_at(tick), actor.x, actor.y))
+        return sprites
+
+    def schedule_finish(self, character, tick):
+        # One-shot clips end on a known tick, so instead of checking every tick
+        # they're queued up here and finished in that character's animation
+        # phase of step() (the hero's, or the skeletons' in spawn order).
+        if character is self.hero:
+            queue, order = self._hero_finishes, 0
+        else:
+            queue, order = self._enemy_finishes, character.slot
+        plays = character.action_animation.plays
+        heapq.heappush(queue, (tick, order, next(self._finish_seq), character, plays))
+
+    def reindex(self):
+        # Rebuilds what's derived from the characters (the floor grid, the clip
+        # finishes still to come) after their state was overwritten wholesale –
+        # see snapshot.restore().
+        self._hero_finishes.clear()
+        self._enemy_finishes.clear()
+        self._ai_near = []
+        self._ai_far.clear()
+        self.enemy_grid.clear()
+        characters = [self.hero]
+        if self.engine is None:
+            characters.extend(self.enemies)
+            for enemy in self.enemies:
+                if enemy.alive:
+                    self.enemy_grid.insert(enemy, enemy.actor.x)
+                    if enemy.ai_step == 1:
+                        self._ai_near.append(enemy)
+                    else:
+                        self._ai_far.setdefault(enemy.ai_tick, []).append(enemy)
+        for character in characters:
+            if character.current_animation is not None:
+                end = character.current_animation.end
+                if end is not None:
+                    self.schedule_finish(character, end)
+
+    def think(self, player):
+        # The skeletons' AI for this tick (object backend): the far ones due
+        # now, then everyone near the hero, each lot in spawn order (a hit
+        # knocks the hero back before the next skeleton looks at him). So the
+        # cost follows how many are close rather than the wave size. Returns
+        # how many thought.
+        if not player.alive:
+            return 0
+        near = self._ai_near
+        far = self._ai_far
+        thought = 0
+        closing = []
+        due = far.pop(self.tick_count, None)
+        if due:
+            due.sort(key=_by_slot)  # booked by far ones and by newly left-behind near ones
+            for enemy in due:
+                if enemy.ai_step == 0:
+                    continue  # died since
+                enemy.update_ai(player)
+                thought += 1
+                if enemy.ai_step == 1:
+                    closing.append(enemy)
+                else:
+                    far.setdefault(enemy.ai_tick, []).append(enemy)
+        changed = False
+        for enemy in near:
+            enemy.update_ai(player)
+            if enemy.ai_step != 1:  # left behind, or dead
+                changed = True
+        thought += len(near)
+        if changed or closing:
+            for enemy in near:
+                if enemy.ai_step > 1:
+                    far.setdefault(enemy.ai_tick, []).append(enemy)
+            near = [enemy for enemy in near if enemy.ai_step == 1]
+            if closing:
+                near.extend(closing)
+                near.sort(key=_by_slot)
+            self._ai_near = near
+        return thought
+
+    def finish_animations(self, queue):
+        tick = self.tick_count
+        enemies = self.enemies
+        while queue and queue[0][0] <= tick:
+            _, order, _, character, plays = heapq.heappop(queue)
+            if (
+                character.current_animation is None
+                or character.action_animation.plays != plays
+            ):
+                continue  # cancelled or replaced since
+            if character is not self.hero and (
+                order >= len(enemies) or enemies[order] is not character
+            ):
+                continue  # a corpse from an earlier wave, not back on the field yet
+            character.finish_animation(tick)
+
+    def state_hash(self):
+        # 16-byte digest of everything that decides what happens next – two runs
+        # with the same hash are in the same state (either enemy backend).
+        hero = self.hero
+        state = [
+            self.tick_count,
+            self.wave_count,
+            self.spawns_left,
+            float(hero.actor.x),
+            hero.health,
+            hero.stamina,
+            hero.alive,
+            hero.orientation,
+            hero.dash_cooldown,
+            hero.frame_at(self.tick_count - 1),
+        ]
+        for enemy in self.enemies:
+            state.append(
+                (
+                    float(enemy.actor.x),
+                    enemy.health,
+                    enemy.alive,
+                    enemy.orientation,
+                    enemy.attack_cooldown,
+                    enemy.attacking,
+                    enemy.ai_step,
+                    enemy.ai_tick,
+                )
+            )
+        state.append(self.rng.getstate())
+        return hashlib.blake2b(repr(state).encode(), digest_size=16).digest()
+
+    def step(self, inputs=NO_INPUT):
+        player = self.hero
+        enemies = self.enemies
+        prof = self.profiler
+        if prof is not None:
+            prof.start()
+            switches = self.animation_switches
+            sounds_started = self.sounds_started
+        # Clicks land between frames, so the attack goes first – same order as on_mouse_down.
+        if inputs.attack and player.alive:
+            player.attack()
+        if player.alive:
+            if not player.is_dashing:
+                moved = False
+                if inputs.left:
+                    player.orientation = "left"
+                    player.actor.x -= 2
+                    moved = True
+                elif inputs.right:
+                    player.orientation = "right"
+                    player.actor.x += 2
+                    moved = True
+
+                if moved:
+                    player.run()
+                else:
+                    if (
+                        player.current_animation
+                        and player.current_animation.animation_name.startswith("run_")
+                    ):
+                        player.animation_queue.clear()
+                        player.cancel_animation()
+                        player.stop_current_sound()
+
+                if inputs.dash:
+                    player.dash()
+                if prof is not None:
+                    prof.mark("input")
+            else:
+                progress = player.dash_timer / player.dash_duration
+                player.actor.x = player.dash_start_x + progress * (
+                    player.dash_target_x - player.dash_start_x
+                )
+                player.dash_timer += 1
+                if player.dash_timer >= player.dash_duration:
+                    player.is_dashing = False
+                    player.dash_cooldown = 60
+                    player.cancel_animation()
+
+            if player.stamina < player.max_stamina:
+                player.stamina = min(player.max_stamina, player.stamina + 1)
+        if player.dash_cooldown > 0:
+            player.dash_cooldown = max(0, player.dash_cooldown - 1)
+        if prof is not None:
+            prof.mark("dash")
+
+        # Frames are only worked out when drawing; all that's left here is
+        # ending the one-shot clips due this tick.
+        self.finish_animations(self._hero_finishes)
+        if prof is not None:
+            prof.mark("animation")
+        # A skeleton's animation only ever touches that skeleton, so running all the
+        # AI first and all the animations after is the same as interleaving them.
+        if self.engine is not None:
+            thinking = self.engine.think(player)
+        else:
+            thinking = self.think(player)
+        if prof is not None:
+            prof.mark("ai")
+            prof.count("ai_updates", thinking)
+        if self.engine is not None:
+            self.engine.animate()
+        else:
+            self.finish_animations(self._enemy_finishes)
+        if prof is not None:
+            prof.mark("animation")
+        # This tick is done for everyone already here – whatever spawns now
+        # starts on the next one.
+        self.tick_count += 1
+        if self.spawns_left:
+            self.spawn_pending()
+        elif player.alive and enemies and not self.any_enemy_alive():
+            self.wave_count += 1
+            self.spawn_wave()
+        if prof is not None:
+            prof.mark("waves")
+            prof.count("enemies", self.enemies_alive())
+            prof.count("anim_switches", self.animation_switches - switches)
+            prof.count("sounds", self.sounds_started - sounds_started)
+
+
+# Dumb but effective: walk to the closest skeleton and swing at it. Good enough
+# to keep the hero alive while stress-testing big waves.
+def autopilot(world, inputs):
+    inputs.clear()
+    hero = world.hero
+    target = world.nearest_enemy(hero.actor.x)
+    if target is None:
+        return inputs
+    dx = target.actor.x - hero.actor.x
+    if abs(dx) > 40:
+        inputs.right = dx > 0
+        inputs.left = dx < 0
+    elif (dx > 0) != (hero.orientation == "right"):
+        inputs.right = dx > 0
+        inputs.left = dx < 0
+    elif (
+        hero.current_animation is None
+        or not hero.current_animation.animation_name.startswith("attack")
+    ):
+        inputs.attack = True
+    return inputs
+
+
+def _seed(text):
+    seed = int(text)
+    if not 0 <= seed < 2**64:
+        raise argparse.ArgumentTypeError(f"{seed} is not a seed replays can store (0..2**64-1)")
+    return seed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the game logic headless (no window, no audio) as fast as possible."
+    )
+    parser.add_argument("--ticks", type=int, default=10000, help="Number of ticks to simulate.")
+    parser.add_argument("--seed", type=_seed, default=None, help="Seed for wave spawns.")
+    parser.add_argument("--wave", type=int, default=1, help="Wave to start at.")
+    parser.add_argument(
+        "--idle",
+        action="store_true",
+        help="Leave the hero standing still instead of using the autopilot.",
+    )
+    parser.add_argument(
+        "--numpy",
+        action="store_true",
+        help="Use the vectorized (NumPy) enemy backend.",
+    )
+    parser.add_argument(
+        "--spawn-mode",
+        choices=("drop", "edges"),
+        default="drop",
+        help="Where new skeletons appear: on the floor, or walking in from the screen edges.",
+    )
+    parser.add_argument(
+        "--quiet", action="store_true", help="Log nothing (same as --log off)."
+    )
+    parser.add_argument(
+        "--log",
+        metavar="SPEC",
+        help="What to log, e.g. debug or info,combat=debug (default: $ROGUEBIRD_LOG or info).",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Write per-phase tick timings to PATH (.json or .csv).",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        help="Save the run (seed + inputs + final state hash) as a replay file.",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="PATH",
+        help="Play back a recorded run (from here or game.py) and check it ends the same.",
+    )
+    args = parser.parse_args()
+
+    inputs = InputState()
+    replay = recorder = None
+    options = {"seed": args.seed, "wave_count": args.wave, "spawn_mode": args.spawn_mode}
+    if args.replay:
+        replay = Replay.load(args.replay)
+        options = replay.world_options()
+        args.ticks = len(replay.ticks)
+    elif args.record and args.seed is None:
+        options["seed"] = random.randrange(2**32)
+    if args.log:
+        eventlog.configure(args.log)
+    with eventlog.muted() if args.quiet else contextlib.nullcontext():
+        world = World(enemy_backend="numpy" if args.numpy else "objects", **options)
+        if args.record:
+            recorder = Recorder(world)
+        if args.profile:
+            world.profiler = FrameProfiler()
+        start = time.perf_counter()
+        for _ in range(args.ticks):
+            if replay is not None:
+                replay.next_inputs(inputs)
+            elif not args.idle:
+                autopilot(world, inputs)
+            if recorder is not None:
+                recorder.record(inputs)
+            world.step(inputs)
+            if world.profiler is not None:
+                world.profiler.end_frame()
+        elapsed = time.perf_counter() - start
+        if recorder is not None:
+            recorder.save(args.record, world)
+    eventlog.flush()  # before the summary, so it comes out last
+    if args.profile:
+        world.profiler.dump(args.profile)
+    alive = sum(1 for enemy in world.enemies if enemy.alive)
+    print(
+        f"{args.ticks} ticks in {elapsed:.3f}s ({args.ticks / elapsed:.0f} ticks/s) – "
+        f"wave {world.wave_count}, hero {'alive' if world.hero.alive else 'dead'} "
+        f"({world.hero.health} HP), {alive}/{len(world.enemies)} skeletons left"
+    )
+    if replay is not None:
+        print(f"replay {'matches' if replay.verify(world) else 'DIVERGED from'} the recording")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+# World snapshots: the whole game state in one small, fixed-layout buffer.
+#
+# A snapshot is a header (clock, wave, counters), the RNG state, one record
+# for the hero and one per skeleton of the current wave – plain struct packing,
+# no pickling of object graphs. restore() writes it back into an existing World
+# (reusing its pooled skeletons), which takes microseconds, so keeping a few
+# seconds of them around for rollback is cheap. Consecutive snapshots are
+# mostly identical bytes, so delta() stores one as the XOR against the one
+# before (zlib squashes the zero runs) and SnapshotRing keeps its history that
+# way.
+#
+# Clips and frame names are stored as small ids into a process-wide table;
+# save()/load() write that table next to the snapshot so a file can be
+# restored by a later run (crash-resume).
+#
+# Not in a snapshot: sounds in flight (restore() stops them) and queued clips
+# (nothing queues any between ticks).
+import json
+import os
+import struct
+import zlib
+from collections import deque
+
+from animation import get_clip
+
+MAGIC = b"RBSN"
+VERSION = 2
+BACKENDS = ("objects", "numpy")
+
+# magic, version, backend, tick, wave, spawns left, animation switches,
+# sounds started, skeletons in the snapshot
+_HEADER = struct.Struct("<4sBBIIIQQI")
+# gauss_next set?, gauss_next, Mersenne Twister state (624 words + position)
+_RNG = struct.Struct("<?d625I")
+# animation: action clip id (0: none), its start, idle start, idle_since,
+# idle_elapsed, hold frame id
+_ANIMATION = "HiiiiH"
+# x, y, health, alive, facing right, stamina, max stamina, dash cooldown,
+# dashing, dash start x, dash target x, dash duration, dash timer + animation
+_HERO = struct.Struct("<ddi??iii?ddii" + _ANIMATION)
+# x, health, alive, facing right, attack cooldown, attacking, AI step, AI tick
+# + animation
+_ENEMY = struct.Struct("<di??i?BI" + _ANIMATION)
+# in a file: length of the JSON id table that follows
+_TABLE = struct.Struct("<I")
+
+# id -> clip key (tuple) or frame name (str); 0 means "none"
+_names = [None]
+_name_ids = {}
+_clip_ids = {}  # Clip -> id, so capturing doesn't build a key tuple every time
+
+
+def _name_id(key):
+    name_id = _name_ids.get(key)
+    if name_id is None:
+        name_id = _name_ids[key] = len(_names)
+        _names.append(key)
+    return name_id
+
+
+def _clip_id(clip):
+    clip_id = _clip_ids.get(clip)
+    if clip_id is None:
+        key = (
+            clip.character_name,
+            clip.animation_name,
+            clip.tick_delay,
+            clip.retain_last_frame,
+            clip.loop,
+            clip.priority,
+        )
+        clip_id = _clip_ids[clip] = _name_id(key)
+    return clip_id
+
+
+def _animation_fields(character):
+    current = character.current_animation
+    return (
+        _clip_id(current.clip) if current is not None else 0,
+        current.start if current is not None else 0,
+        character.idle_animation.start,
+        character.idle_since,
+        character.idle_elapsed,
+        _name_id(character.hold_frame),
+    )
+
+
+def _restore_animation(character, fields, names):
+    clip_id, start, idle_start, idle_since, idle_elapsed, hold_id = fields
+    if clip_id:
+        clip = get_clip(*names[clip_id])
+        character.current_animation = character.action_animation.play(clip, start)
+    else:
+        character.current_animation = None
+    character.idle_animation.start = idle_start
+    character.idle_since = idle_since
+    character.idle_elapsed = idle_elapsed
+    character.hold_frame = names[hold_id]
+    character.animation_queue.clear()
+
+
+def capture(world):
+    engine = world.engine
+    enemies = world.enemies
+    parts = [
+        _HEADER.pack(
+            MAGIC,
+            VERSION,
+            BACKENDS.index("numpy" if engine is not None else "objects"),
+            world.tick_count,
+            world.wave_count,
+            world.spawns_left,
+            world.animation_switches,
+            world.sounds_started,
+            len(enemies),
+        )
+    ]
+    _, words, gauss = world.rng.getstate()
+    parts.append(_RNG.pack(gauss is not None, gauss or 0.0, *words))
+    hero = world.hero
+    parts.append(
+        _HERO.pack(
+            hero.actor.x,
+            hero.actor.y,
+            hero.health,
+            hero.alive,
+            hero.orientation == "right",
+            hero.stamina,
+            hero.max_stamina,
+            hero.dash_cooldown,
+            hero.is_dashing,
+            hero.dash_start_x,
+            hero.dash_target_x,
+            hero.dash_duration,
+            hero.dash_timer,
+            *_animation_fields(hero),
+        )
+    )
+    if engine is not None:
+        # the engine's columns as they are – already a fixed layout
+        from enemy_engine import _COLUMNS
+
+        parts.extend(getattr(engine, column).tobytes() for column, _, _ in _COLUMNS)
+    else:
+        pack = _ENEMY.pack
+        for enemy in enemies:
+            parts.append(
+                pack(
+                    enemy.actor.x,
+                    enemy.health,
+                    enemy.alive,
+                    enemy.orientation == "right",
+                    enemy.attack_cooldown,
+                    enemy.attacking,
+                    enemy.ai_step,
+                    enemy.ai_tick,
+                    *_animation_fields(enemy),
+                )
+            )
+    return b"".join(parts)
+
+
+def _size(engine, count):
+    # bytes in a snapshot of count skeletons
+    if engine is not None:
+        import numpy as np
+
+        from enemy_engine import _COLUMNS
+
+        per_enemy = sum(np.dtype(dtype).itemsize for _, dtype, _ in _COLUMNS)
+    else:
+        per_enemy = _ENEMY.size
+    return _HEADER.size + _RNG.size + _HERO.size + per_enemy * count
+
+
+def restore(world, buffer, names=None):
+    """
+    Puts world back into the state captured in buffer. world must use the same
+    enemy backend; anything else about it (seed, wave, ...) gets overwritten.
+    names is the id table from load() for snapshots from another run.
+    """
+    names = _names if names is None else names
+    try:
+        magic, version, backend, tick, wave, spawns_left, switches, sounds, count = (
+            _HEADER.unpack_from(buffer)
+        )
+    except struct.error:
+        magic = None
+    if magic != MAGIC or version != VERSION or backend >= len(BACKENDS):
+        raise ValueError("Not a world snapshot this build can read")
+    engine = world.engine
+    if BACKENDS[backend] != ("numpy" if engine is not None else "objects"):
+        raise ValueError(f"Snapshot is from the {BACKENDS[backend]} enemy backend")
+    # checked before anything gets overwritten – a short one would leave the
+    # world half restored
+    if len(buffer) != _size(engine, count):
+        raise ValueError("Snapshot is truncated")
+    offset = _HEADER.size
+    world.tick_count = tick
+    world.wave_count = wave
+    world.spawns_left = spawns_left
+    world.animation_switches = switches
+    world.sounds_started = sounds
+
+    gauss_set, gauss, *words = _RNG.unpack_from(buffer, offset)
+    world.rng.setstate((3, tuple(words), gauss if gauss_set else None))
+    offset += _RNG.size
+
+    hero = world.hero
+    fields = _HERO.unpack_from(buffer, offset)
+    offset += _HERO.size
+    hero.stop_current_sound()
+    (
+        hero.actor.x,
+        hero.actor.y,
+        hero.health,
+        hero.alive,
+        right,
+        hero.stamina,
+        hero.max_stamina,
+        hero.dash_cooldown,
+        hero.is_dashing,
+        hero.dash_start_x,
+        hero.dash_target_x,
+        hero.dash_duration,
+        hero.dash_timer,
+    ) = fields[:13]
+    hero.orientation = "right" if right else "left"
+    _restore_animation(hero, fields[13:], names)
+
+    enemies = world.enemies
+    if engine is not None:
+        import numpy as np
+
+        from enemy_engine import _COLUMNS
+
+        columns = {}
+        for column, dtype, _ in _COLUMNS:
+            size = np.dtype(dtype).itemsize * count
+            columns[column] = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset).copy()
+            offset += size
+        engine.load(count, engine.y, columns)
+        enemies[:] = engine.views(0)
+    else:
+        for enemy in enemies:
+            enemy.stop_current_sound()
+        enemies.clear()
+        unpack = _ENEMY.unpack_from
+        for slot in range(count):
+            fields = unpack(buffer, offset)
+            offset += _ENEMY.size
+            enemy = world.pooled_enemy(slot, fields[0])
+            enemy.actor.x = fields[0]
+            enemy.health, enemy.alive, right, enemy.attack_cooldown, enemy.attacking = fields[1:6]
+            enemy.ai_step, enemy.ai_tick = fields[6:8]
+            enemy.orientation = "right" if right else "left"
+            _restore_animation(enemy, fields[8:], names)
+            enemies.append(enemy)
+    world.reindex()
+
+
+def delta(previous, current):
+    # current as the XOR against previous (mostly zeros), compressed. Falls back
+    # to the whole of current when the sizes differ (a new wave came in).
+    if len(previous) == len(current):
+        diff = int.from_bytes(previous, "little") ^ int.from_bytes(current, "little")
+        return b"x" + zlib.compress(diff.to_bytes(len(current), "little"), 1)
+    return b"=" + zlib.compress(current, 1)
+
+
+def apply_delta(previous, data):
+    body = zlib.decompress(data[1:])
+    if data[:1] == b"=":
+        return body
+    diff = int.from_bytes(previous, "little") ^ int.from_bytes(body, "little")
+    return diff.to_bytes(len(body), "little")
+
+
+def save(path, buffer):
+    # Written next to path and swapped in, so a crash halfway through leaves
+    # the previous save, not half of this one.
+    table = json.dumps(_names).encode()
+    partial = f"{path}.part"
+    with open(partial, "wb") as f:
+        f.write(_TABLE.pack(len(table)) + table + zlib.compress(buffer))
+    os.replace(partial, path)
+
+
+def load(path):
+    # -> (snapshot, id table) – pass both to restore(). A file that isn't a
+    # whole save raises ValueError, like restore() does for a wrong version.
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        (size,) = _TABLE.unpack_from(data)
+        names = [
+            tuple(key) if isinstance(key, list) else key
+            for key in json.loads(data[_TABLE.size : _TABLE.size + size])
+        ]
+        return zlib.decompress(data[_TABLE.size + size :]), names
+    except (struct.error, zlib.error) as e:
+        raise ValueError(f"Not a complete save file: {e}") from None
+
+
+class SnapshotRing:
+    # The last `capacity` snapshots, as deltas against each other with a full
+    # one at least every `keyframe_every` (so getting one back never chains
+    # through more than that many deltas).
+    def __init__(self, capacity=300, keyframe_every=60):
+        self.capacity = capacity
+        self.keyframe_every = keyframe_every
+        self._entries = deque()  # (tick, full?, snapshot or delta), oldest first
+        self._latest = None  # newest snapshot in full
+        self._since_keyframe = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def capture(self, world):
+        self.push(capture(world), world.tick_count)
+
+    def push(self, buffer, tick):
+        entries = self._entries
+        if self._latest is None or self._since_keyframe + 1 >= self.keyframe_every:
+            entries.append((tick, True, buffer))
+            self._since_keyframe = 0
+        else:
+            entries.append((tick, False, delta(self._latest, buffer)))
+            self._since_keyframe += 1
+        self._latest = buffer
+        if len(entries) > self.capacity:
+            # the oldest is always a full one; the next becomes full in its place
+            _, _, base = entries.popleft()
+            tick, full, data = entries[0]
+            if not full:
+                entries[0] = (tick, True, apply_delta(base, data))
+
+    def latest(self):
+        return self._latest
+
+    def get(self, back=0):
+        # The snapshot `back` entries before the newest (0 is the newest) and its tick.
+        entries = self._entries
+        position = len(entries) - 1 - back
+        if position < 0 or back < 0:
+            raise IndexError(f"only {len(entries)} snapshots kept")
+        if back == 0:
+            return self._latest, entries[position][0]
+        start = position
+        while not entries[start][1]:
+            start -= 1
+        buffer = entries[start][2]
+        for index in range(start + 1, position + 1):
+            buffer = apply_delta(buffer, entries[index][2])
+        return buffer, entries[position][0]
+
+    def back_to(self, tick):
+        # How many entries back the newest snapshot from tick or earlier is
+        # (the oldest one kept, if they're all later).
+        entries = self._entries
+        for back in range(len(entries)):
+            if entries[-1 - back][0] <= tick:
+                return back
+        return max(len(entries) - 1, 0)
+
+    def rewind(self, world, back):
+        # Restores world to `back` snapshots ago and forgets everything after
+        # it, so history carries on from there. Returns the tick it went back to.
+        buffer, tick = self.get(back)
+        restore(world, buffer)
+        entries = self._entries
+        for _ in range(back):
+            entries.pop()
+        self._latest = buffer
+        self._since_keyframe = 0
+        for _, full, _ in reversed(entries):
+            if full:
+                break
+            self._since_keyframe += 1
+        return tick
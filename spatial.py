@@ -0,0 +1,104 @@
+# 1-D spatial index for things standing on the floor.
+#
+# Everything in this game lives on one line (GAME_FLOOR), so instead of scanning
+# every skeleton we drop them into fixed-width buckets along x. A skeleton only
+# changes bucket every cell_size pixels of walking, so keeping the index fresh is
+# a dict lookup most of the time, and "who's in front of me within 50px" only
+# looks at a couple of buckets no matter how big the wave is.
+#
+# Items just need .actor.x and a .slot (spawn order) – the slot breaks distance
+# ties so results are the same as walking the enemies list front to back.
+import math
+
+
+class FloorGrid:
+    def __init__(self, cell_size=50):
+        self.cell_size = cell_size
+        self.cells = {}  # cell index -> set of items
+
+    def _cell(self, x):
+        return math.floor(x / self.cell_size)
+
+    def clear(self):
+        self.cells.clear()
+
+    def insert(self, item, x):
+        self.cells.setdefault(self._cell(x), set()).add(item)
+
+    def remove(self, item, x):
+        cell = self._cell(x)
+        bucket = self.cells.get(cell)
+        if bucket is not None:
+            bucket.discard(item)
+            if not bucket:
+                del self.cells[cell]
+
+    def move(self, item, old_x, new_x):
+        old_cell = self._cell(old_x)
+        new_cell = self._cell(new_x)
+        if old_cell == new_cell:
+            return
+        bucket = self.cells[old_cell]
+        bucket.discard(item)
+        if not bucket:
+            del self.cells[old_cell]
+        self.cells.setdefault(new_cell, set()).add(item)
+
+    def __len__(self):
+        return sum(len(bucket) for bucket in self.cells.values())
+
+    def nearest(self, x, orientation=None, reach=None):
+        # Closest item to x. orientation "right"/"left" only counts items strictly
+        # on that side, reach caps the distance. Walks buckets outwards from x and
+        # stops as soon as no further bucket could beat the best hit so far.
+        cells = self.cells
+        if not cells:
+            return None
+        size = self.cell_size
+        home = self._cell(x)
+        lowest = min(cells)
+        highest = max(cells)
+        max_ring = max(home - lowest, highest - home)
+        if reach is not None:
+            max_ring = min(max_ring, math.ceil(reach / size) + 1)
+        best = None
+        best_key = None
+        for ring in range(max_ring + 1):
+            if ring == 0:
+                ring_cells = (home,)
+            elif orientation == "right":
+                ring_cells = (home + ring,)
+            elif orientation == "left":
+                ring_cells = (home - ring,)
+            else:
+                ring_cells = (home - ring, home + ring)
+            for cell in ring_cells:
+                bucket = cells.get(cell)
+                if not bucket:
+                    continue
+                for item in bucket:
+                    ix = item.actor.x
+                    if (orientation == "right" and ix <= x) or (
+                        orientation == "left" and ix >= x
+                    ):
+                        continue
+                    distance = abs(ix - x)
+                    if reach is not None and distance > reach:
+                        continue
+                    key = (distance, item.slot)
+                    if best_key is None or key < best_key:
+                        best, best_key = item, key
+            # everything in the next ring is at least ring * size away
+            if best_key is not None and best_key[0] <= ring * size:
+                break
+        return best
+
+    def within(self, x, reach):
+        # Every item at most reach away from x, in spawn order.
+        found = []
+        for cell in range(self._cell(x - reach), self._cell(x + reach) + 1):
+            bucket = self.cells.get(cell)
+            if bucket:
+                found.extend(item for item in bucket if abs(item.actor.x - x) <= reach)
+        found.sort(key=lambda item: item.slot)
+        return found
@@ -0,0 +1,86 @@
+# pgzero side of the animation frames.
+#
+# Image names go through frame_surface(): stored frames come from pgzero's
+# image cache (seeded from the atlas), and the mirrored _left frames that
+# aren't on disk are flipped from their _right twin the first time they're
+# shown, then kept. Every name is memoized, so switching frames every tick is
+# one dict lookup.
+#
+# Frames are stored trimmed to their opaque pixels, so each one comes with its
+# own anchor: the spot on the (small) surface where the centre of the full GIF
+# frame would be. Positions keep meaning what they always did, only a lot fewer
+# transparent pixels get blitted.
+#
+# The game draws without Actors: sprite_layers() turns World.sprites()
+# (image names + positions) into the renderer's layers, one memoized lookup per
+# sprite for the surface and where its top-left goes.
+import pygame
+from pgzero import loaders
+from pgzero.actor import calculate_anchor
+
+from animation import mirror_source, resolve_frames, trim_offset
+
+_surfaces = {}  # image name -> Surface (loaded or flipped)
+_anchors = {}  # image name -> anchor, the way Actor takes one
+_placements = {}  # image name -> (surface, anchor x, anchor y) in pixels
+
+
+def frame_surface(name):
+    surface = _surfaces.get(name)
+    if surface is None:
+        source = mirror_source(name)
+        if source is None:
+            surface = loaders.images.load(name)
+        else:
+            surface = pygame.transform.flip(frame_surface(source), True, False)
+        _surfaces[name] = surface
+    return surface
+
+
+def frame_anchor(name):
+    anchor = _anchors.get(name)
+    if anchor is None:
+        source = mirror_source(name)
+        offset = trim_offset(source or name)
+        if offset is None:
+            anchor = ("center", "center")  # stored full size
+        else:
+            x, y, full_w, full_h = offset
+            if source is not None:
+                # the crop lands on the other side once the frame is flipped
+                x = full_w - x - frame_surface(name).get_width()
+            anchor = (full_w / 2 - x, full_h / 2 - y)
+        _anchors[name] = anchor
+    return anchor
+
+
+def frame_placement(name):
+    placement = _placements.get(name)
+    if placement is None:
+        # the anchor the way Actor works it out, so rects come out the same
+        surface = frame_surface(name)
+        ax, ay = frame_anchor(name)
+        w, h = surface.get_size()
+        placement = (surface, calculate_anchor(ax, "x", w), calculate_anchor(ay, "y", h))
+        _placements[name] = placement
+    return placement
+
+
+def sprite_layers(sprites):
+    # World.sprites() -> [(key, surface, topleft)] for render.py, same order.
+    layers = []
+    for key, name, x, y in sprites:
+        placement = _placements.get(name) or frame_placement(name)
+        layers.append((key, placement[0], (x - placement[1], y - placement[2])))
+    return layers
+
+
+def preload_frames(base):
+    # Every stored frame of "<character>_<animation>", loaded ahead of time.
+    # Mirrored ones are left to be flipped when first shown: flipping is quick,
+    # and keeping every one of them around would double the frame memory.
+    character, animation = base.split("_", 1)
+    for name in resolve_frames(character, animation):
+        if mirror_source(name) is None:
+            frame_placement(name)
+
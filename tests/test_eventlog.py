@@ -0,0 +1,130 @@
+# Event log: levels, the rate limit and the one writer thread.
+import json
+import threading
+
+import pytest
+
+import eventlog
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def logged(tmp_path, monkeypatch):
+    # Logs JSON lines to a file, rate limit off; gives back a reader for them.
+    saved = (eventlog._default_level, eventlog._levels, eventlog._rate, eventlog._path)
+    path = tmp_path / "events.jsonl"
+    eventlog.configure("debug", rate=0, path=str(path))
+
+    def read():
+        eventlog.flush()
+        if not path.exists():
+            return []
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    yield read
+    eventlog.flush()
+    eventlog._default_level, eventlog._levels, eventlog._rate, eventlog._path = saved
+    eventlog.configure()
+
+
+def test_parse_spec():
+    assert eventlog.parse_spec("info") == (eventlog.INFO, {})
+    assert eventlog.parse_spec("warning, combat=debug,sound=off") == (
+        eventlog.WARNING,
+        {"combat": eventlog.DEBUG, "sound": eventlog.OFF},
+    )
+    assert eventlog.parse_spec("") == (eventlog.INFO, {})
+    with pytest.raises(ValueError):
+        eventlog.parse_spec("loud")
+
+
+def test_events_come_out_formatted(logged):
+    log = eventlog.channel("test-format")
+    log.info("{name} hit {target} for {damage} HP!", name="Niyazi", target="skeleton", damage=20)
+    log.warning("broken {template")
+    (hit, broken) = logged()
+    assert hit["level"] == "info"
+    assert hit["category"] == "test-format"
+    assert hit["message"] == "Niyazi hit skeleton for 20 HP!"
+    assert hit["fields"] == {"name": "Niyazi", "target": "skeleton", "damage": 20}
+    assert "bad template" in broken["message"]
+
+
+def test_levels_per_category(logged):
+    chatty = eventlog.channel("test-chatty")
+    quiet = eventlog.channel("test-quiet")
+    eventlog.configure("info,test-chatty=debug,test-quiet=off")
+    assert chatty.verbose and not quiet.verbose
+    chatty.debug("kept")
+    quiet.error("not kept")
+    eventlog.channel("test-default").debug("not kept either")
+    eventlog.channel("test-default").info("kept too")
+    assert [e["message"] for e in logged()] == ["kept", "kept too"]
+
+
+def test_muted(logged):
+    log = eventlog.channel("test-muted")
+    with eventlog.muted():
+        assert log.level == eventlog.OFF and not log.verbose
+        with eventlog.muted():
+            log.error("nope")
+        log.error("still nope")
+    assert log.verbose
+    log.info("back")
+    assert [e["message"] for e in logged()] == ["back"]
+
+
+def test_rate_limit_drops_and_reports(logged, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(eventlog, "_clock", clock)
+    eventlog.configure(rate=5)
+    log = eventlog.channel("test-rate")
+    log._tokens, log._last = 5.0, clock.now  # a full bucket, as of now
+
+    for i in range(12):
+        log.info("event {i}", i=i)
+    assert log.dropped == 7
+
+    clock.now += 1.0  # refills: the next one gets through, after the report
+    log.info("later")
+    assert log.dropped == 7
+    messages = [e["message"] for e in logged()]
+    assert messages == [f"event {i}" for i in range(5)] + [
+        "7 test-rate events dropped (rate limit)",
+        "later",
+    ]
+
+
+def test_flush_reports_drops_still_pending(logged, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(eventlog, "_clock", clock)
+    eventlog.configure(rate=1)
+    log = eventlog.channel("test-pending")
+    log._tokens, log._last = 1.0, clock.now
+    log.info("one")
+    log.info("two")
+    log.info("three")
+    events = logged()
+    assert [e["message"] for e in events] == ["one", "2 test-pending events dropped (rate limit)"]
+    assert events[-1]["level"] == "warning"
+    assert log._dropping == 0
+
+
+def test_flush_keeps_one_writer(logged):
+    log = eventlog.channel("test-writer")
+    log.info("first")
+    eventlog.flush()
+    writer = eventlog._writer
+    for i in range(20):
+        log.info("event {i}", i=i)
+        eventlog.flush(timeout=0)  # gives up straight away, the writer carries on
+    assert eventlog._writer is writer
+    assert sum(t.name == "eventlog" for t in threading.enumerate()) == 1
+    assert len(logged()) == 21
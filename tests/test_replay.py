@@ -0,0 +1,91 @@
+# Record a session, play it back, land on the same state.
+import random
+import zlib
+
+import pytest
+
+from replay import Recorder, Replay
+from sim import InputState, World
+
+
+def _record(path, ticks=900, seed=12345, **options):
+    world = World(seed=seed, spawn_budget_ms=None, **options)
+    recorder = Recorder(world)
+    inputs = InputState()
+    rng = random.Random(seed)
+    for _ in range(ticks):
+        inputs.left = rng.random() < 0.3
+        inputs.right = rng.random() < 0.3
+        inputs.dash = rng.random() < 0.03
+        inputs.attack = rng.random() < 0.15
+        recorder.record(inputs)
+        world.step(inputs)
+    recorder.save(path, world)
+    return world
+
+
+def _play(replay, **options):
+    world = World(**replay.world_options(), **options)
+    inputs = InputState()
+    while not replay.finished:
+        world.step(replay.next_inputs(inputs))
+    return world
+
+
+@pytest.mark.parametrize("spawn_mode", ["drop", "edges"])
+def test_round_trip(tmp_path, spawn_mode):
+    path = tmp_path / "run.rbr"
+    recorded = _record(path, wave_count=3, spawn_mode=spawn_mode)
+    replay = Replay.load(path)
+    assert replay.world_options()["spawn_mode"] == spawn_mode
+    assert len(replay.ticks) == 900
+    world = _play(replay)
+    assert world.state_hash() == recorded.state_hash()
+    assert replay.verify(world)
+
+
+def test_round_trip_on_the_numpy_backend(tmp_path):
+    pytest.importorskip("numpy")
+    path = tmp_path / "run.rbr"
+    _record(path, wave_count=4)
+    replay = Replay.load(path)
+    assert replay.verify(_play(replay, enemy_backend="numpy"))
+
+
+def test_other_inputs_are_caught(tmp_path):
+    path = tmp_path / "run.rbr"
+    _record(path)
+    replay = Replay.load(path)
+    replay.ticks = bytes(len(replay.ticks))  # stand still the whole time
+    assert not replay.verify(_play(replay))
+
+
+def test_largest_seed_round_trips(tmp_path):
+    path = tmp_path / "run.rbr"
+    _record(path, ticks=60, seed=2**64 - 1)
+    assert Replay.load(path).seed == 2**64 - 1
+
+
+@pytest.mark.parametrize("seed", [None, -1, 2**64])
+def test_unstorable_seeds_are_refused_up_front(seed):
+    with pytest.raises(ValueError):
+        Recorder(World(seed=seed))
+
+
+def test_truncated_file_is_refused(tmp_path):
+    path = tmp_path / "run.rbr"
+    _record(path)
+    data = path.read_bytes()
+    path.write_bytes(data[:-8])
+    with pytest.raises((ValueError, zlib.error)):
+        Replay.load(path)
+
+
+def test_other_versions_are_refused(tmp_path):
+    path = tmp_path / "run.rbr"
+    _record(path, ticks=10)
+    data = bytearray(path.read_bytes())
+    data[4] += 1  # version byte, right after the magic
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        Replay.load(path)
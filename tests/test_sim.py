@@ -0,0 +1,32 @@
+# World rules that don't have a module of their own.
+import time
+
+from sim import InputState, World
+
+
+def test_spawn_budget_counts_making_the_skeletons(monkeypatch):
+    # Each skeleton takes 1 ms to make: a 2 ms budget lets a tick have 2 or 3,
+    # not all spawn_per_tick of them.
+    pooled_enemy = World.pooled_enemy
+
+    def slow(self, slot, x):
+        time.sleep(0.001)
+        return pooled_enemy(self, slot, x)
+
+    monkeypatch.setattr(World, "pooled_enemy", slow)
+    world = World(seed=1, wave_count=8, spawn_budget_ms=2.0)
+    assert world.spawn_per_tick > 3
+    before = (len(world.enemies), world.spawns_left)
+    world.step(InputState())
+    spawned = len(world.enemies) - before[0]
+    assert 1 <= spawned <= 3
+    assert world.spawns_left == before[1] - spawned
+
+
+def test_no_budget_spawns_a_full_batch():
+    world = World(seed=1, wave_count=8)
+    before = (len(world.enemies), world.spawns_left)
+    world.step(InputState())
+    spawned = min(before[1], world.spawn_per_tick)
+    assert len(world.enemies) == before[0] + spawned
+    assert world.spawns_left == before[1] - spawned
@@ -0,0 +1,139 @@
+# Snapshots: restore exactly, deltas reverse, the ring hands back what went in.
+import random
+
+import pytest
+
+import snapshot
+from sim import InputState, World
+
+def _backends():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return ["objects"]
+    return ["objects", "numpy"]
+
+
+def _steps(world, count, seed):
+    rng = random.Random(seed)
+    inputs = InputState()
+    for _ in range(count):
+        inputs.left = rng.random() < 0.3
+        inputs.right = rng.random() < 0.3
+        inputs.dash = rng.random() < 0.03
+        inputs.attack = rng.random() < 0.15
+        world.step(inputs)
+
+
+@pytest.mark.parametrize("backend", _backends())
+def test_restore_then_replay_matches(backend):
+    world = World(seed=3, wave_count=6, enemy_backend=backend)
+    _steps(world, 400, seed=1)
+    saved = snapshot.capture(world)
+    _steps(world, 300, seed=2)
+    expected = world.state_hash()
+
+    snapshot.restore(world, saved)
+    assert snapshot.capture(world) == saved
+    _steps(world, 300, seed=2)
+    assert world.state_hash() == expected
+
+
+@pytest.mark.parametrize("backend", _backends())
+def test_restore_into_a_fresh_world_from_a_file(tmp_path, backend):
+    world = World(seed=9, wave_count=4, enemy_backend=backend)
+    _steps(world, 500, seed=4)
+    path = tmp_path / "save.rbsn"
+    snapshot.save(path, snapshot.capture(world))
+
+    other = World(seed=1, enemy_backend=backend)
+    snapshot.restore(other, *snapshot.load(path))
+    assert other.state_hash() == world.state_hash()
+    _steps(world, 200, seed=5)
+    _steps(other, 200, seed=5)
+    assert other.state_hash() == world.state_hash()
+
+
+def test_restore_refuses_the_other_backend():
+    pytest.importorskip("numpy")
+    saved = snapshot.capture(World(seed=1))
+    with pytest.raises(ValueError):
+        snapshot.restore(World(seed=1, enemy_backend="numpy"), saved)
+
+
+def test_restore_refuses_other_versions():
+    saved = bytearray(snapshot.capture(World(seed=1)))
+    saved[4] += 1  # version byte, right after the magic
+    with pytest.raises(ValueError):
+        snapshot.restore(World(seed=1), bytes(saved))
+
+
+@pytest.mark.parametrize(
+    "previous, current",
+    [(b"abcdef", b"abcxef"), (b"\x00" * 64, b"\x00" * 63 + b"\x01"), (b"short", b"a lot longer")],
+)
+def test_delta_round_trip(previous, current):
+    assert snapshot.apply_delta(previous, snapshot.delta(previous, current)) == current
+
+
+def test_ring_hands_back_every_snapshot_it_keeps():
+    world = World(seed=5, wave_count=3)
+    ring = snapshot.SnapshotRing(capacity=40, keyframe_every=7)
+    captured = []
+    for i in range(100):
+        _steps(world, 1 + i % 3, seed=i)
+        ring.capture(world)
+        captured.append((snapshot.capture(world), world.tick_count))
+    assert len(ring) == 40
+    for back in range(40):
+        assert ring.get(back) == captured[-1 - back]
+    with pytest.raises(IndexError):
+        ring.get(40)
+
+
+def test_ring_rewind_and_back_to():
+    world = World(seed=5, wave_count=3)
+    ring = snapshot.SnapshotRing(capacity=30, keyframe_every=5)
+    ticks = []
+    for i in range(50):
+        _steps(world, 2, seed=i)
+        ring.capture(world)
+        ticks.append(world.tick_count)
+    back = ring.back_to(world.tick_count - 21)
+    assert ring.get(back)[1] == max(t for t in ticks if t <= world.tick_count - 21)
+    assert ring.back_to(0) == len(ring) - 1  # older than anything kept: the oldest
+
+    buffer, tick = ring.get(back)
+    assert ring.rewind(world, back) == tick
+    assert world.tick_count == tick
+    assert snapshot.capture(world) == buffer
+    assert len(ring) == 30 - back
+    _steps(world, 2, seed=99)  # and history carries on from there
+    ring.capture(world)
+    assert ring.get(0)[1] == world.tick_count
+    assert ring.get(1) == (buffer, tick)
+
+
+def test_broken_save_files_raise_value_error(tmp_path):
+    world = World(seed=9, wave_count=4)
+    _steps(world, 200, seed=4)
+    path = tmp_path / "save.rbsn"
+    snapshot.save(path, snapshot.capture(world))
+    data = path.read_bytes()
+    assert not (tmp_path / "save.rbsn.part").exists()
+    for broken in (data[:2], data[:40], data[:-10], data[:-1] + bytes([data[-1] ^ 1])):
+        path.write_bytes(broken)
+        with pytest.raises(ValueError):
+            snapshot.load(path)
+
+
+def test_short_snapshots_leave_the_world_alone():
+    world = World(seed=9, wave_count=4)
+    _steps(world, 200, seed=4)
+    saved = snapshot.capture(world)
+    other = World(seed=2, wave_count=2)
+    before = other.state_hash()
+    for broken in (saved[:3], saved[:-1], saved + b"\0"):
+        with pytest.raises(ValueError):
+            snapshot.restore(other, broken)
+    assert other.state_hash() == before
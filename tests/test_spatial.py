@@ -0,0 +1,73 @@
+# FloorGrid against a plain scan of every item.
+import random
+
+import pytest
+
+from spatial import FloorGrid
+
+
+class Item:
+    def __init__(self, x, slot):
+        self.actor = self  # FloorGrid reads item.actor.x
+        self.x = x
+        self.slot = slot
+
+
+def _scan(items, x, orientation=None, reach=None):
+    best = None
+    for item in items:  # in slot order, so the first of equals wins
+        if orientation == "right" and item.x <= x or orientation == "left" and item.x >= x:
+            continue
+        distance = abs(item.x - x)
+        if reach is not None and distance > reach:
+            continue
+        if best is None or distance < abs(best.x - x):
+            best = item
+    return best
+
+
+def _grid(items, cell_size=50):
+    grid = FloorGrid(cell_size)
+    for item in items:
+        grid.insert(item, item.x)
+    return grid
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_nearest_matches_a_scan(seed):
+    rng = random.Random(seed)
+    items = [Item(rng.uniform(-100, 1000), slot) for slot in range(60)]
+    items += [Item(items[0].x, 60)]  # a tie, broken by slot
+    grid = _grid(items)
+    for _ in range(200):
+        x = rng.uniform(-200, 1100)
+        for orientation in (None, "left", "right"):
+            for reach in (None, 50, 300):
+                assert grid.nearest(x, orientation, reach) is _scan(items, x, orientation, reach)
+
+
+def test_within_is_in_slot_order():
+    rng = random.Random(1)
+    items = [Item(rng.randrange(0, 900), slot) for slot in range(80)]
+    grid = _grid(items, cell_size=40)
+    for x in (0, 123, 450, 899):
+        expected = [item for item in items if abs(item.x - x) <= 75]
+        assert grid.within(x, 75) == expected
+
+
+def test_move_and_remove_keep_the_index_fresh():
+    items = [Item(x, slot) for slot, x in enumerate((10, 120, 400))]
+    grid = _grid(items)
+    walker = items[0]
+    for _ in range(300):  # walk right across several cells
+        old = walker.x
+        walker.x += 1
+        grid.move(walker, old, walker.x)
+    assert len(grid) == 3
+    assert grid.nearest(305) is walker
+    grid.remove(walker, walker.x)
+    assert len(grid) == 2
+    assert grid.nearest(305) is items[2]
+    grid.remove(items[1], items[1].x)
+    grid.remove(items[2], items[2].x)
+    assert grid.nearest(0) is None and not grid.cells
@@ -0,0 +1,86 @@
+# Trimmed frames, drawn at their anchors, have to land exactly where the full
+# GIF frames would have.
+import hashlib
+import os
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pygame = pytest.importorskip("pygame")
+pytest.importorskip("pgzero")
+
+import unfurl_gif  # noqa: E402
+from animation import frame_bases, resolve_frames  # noqa: E402
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The full-size knight_idle_0.png the game shipped before frames were trimmed
+# (RGBA bytes). The manifest has to extract exactly that art – the hero's
+# colours come from which GIF it names.
+KNIGHT_IDLE_0 = "6bfb579685b4df31d44977f855e644f8acebbb6988c7a8bca6b7da165de12f4c"
+
+
+def test_trim_frame_crops_to_the_opaque_pixels():
+    frame = Image.new("RGBA", (40, 30), (0, 0, 0, 0))
+    frame.putpixel((5, 7), (255, 0, 0, 255))
+    frame.putpixel((12, 20), (0, 255, 0, 128))
+    cropped, offset = unfurl_gif.trim_frame(frame)
+    assert cropped.size == (8, 14)
+    assert offset == [5, 7, 40, 30]
+    assert cropped.getpixel((0, 0)) == (255, 0, 0, 255)
+
+
+def test_trim_frame_keeps_a_pixel_of_an_empty_frame():
+    cropped, offset = unfurl_gif.trim_frame(Image.new("RGBA", (10, 10)))
+    assert cropped.size == (1, 1)
+    assert offset == [0, 0, 10, 10]
+
+
+@pytest.fixture(scope="module")
+def untrimmed(tmp_path_factory):
+    # Every manifest GIF unfurled at full size: the reference frames.
+    target = str(tmp_path_factory.mktemp("full"))
+    for job in unfurl_gif.load_manifest(os.path.join(HERE, "unfurl_manifest.json")):
+        unfurl_gif.unfurl_gif(
+            job["gif"], job["character"], job["animation"], target, verbose=False, trim=False
+        )
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    from pgzero import loaders
+
+    loaders.set_root(HERE)
+    yield target
+    pygame.display.quit()
+
+
+def test_manifest_extracts_the_shipped_knight(untrimmed):
+    frame = pygame.image.load(os.path.join(untrimmed, "knight_idle_0.png"))
+    assert frame.get_size() == (120, 80)
+    assert hashlib.sha256(pygame.image.tobytes(frame, "RGBA")).hexdigest() == KNIGHT_IDLE_0
+
+
+def _canvas(surface, topleft):
+    # over an opaque background, like the game draws them – fully transparent
+    # pixels can have any colour
+    canvas = pygame.Surface((400, 300))
+    canvas.fill((40, 90, 60))
+    canvas.blit(surface, topleft)
+    return pygame.image.tobytes(canvas, "RGBA")
+
+
+@pytest.mark.parametrize("base", frame_bases())
+def test_anchored_frames_land_where_the_full_frames_would(untrimmed, base):
+    from sprites import sprite_layers
+
+    character, animation = base.split("_", 1)
+    stored = animation.replace("_left", "_right")
+    x, y = 200.0, 150.0
+    for index, name in enumerate(resolve_frames(character, animation)):
+        full = pygame.image.load(os.path.join(untrimmed, f"{character}_{stored}_{index}.png"))
+        if stored != animation:
+            full = pygame.transform.flip(full, True, False)
+        # an untrimmed frame is drawn centred on the character's position
+        expected = _canvas(full, (int(x - full.get_width() / 2), int(y - full.get_height() / 2)))
+        ((_, surface, (left, top)),) = sprite_layers([(None, name, x, y)])
+        assert surface.get_width() <= full.get_width()
+        assert _canvas(surface, (int(left), int(top))) == expected, name
@@ -0,0 +1,41 @@
+# Fixed-timestep scheduling.
+#
+# The rules (sim.py) count everything in ticks – a 10-tick dash, a 60-tick
+# cooldown, a pixel a tick for a walking skeleton – so the game only plays at
+# the right speed if exactly TICK_RATE ticks run per second. advance() turns a
+# frame's real duration into a number of ticks: usually one, none on a frame
+# that came early, a few to catch up after a slow one. Past max_steps the rest
+# is dropped (the game slows down for a moment rather than spiralling, each
+# catch-up frame taking longer than the last). Whatever time is left over
+# (alpha, 0..1 of a tick) is how far the next tick along the screen is, for
+# interpolating things that move fast.
+class FixedTimestep:
+    def __init__(self, rate=60, max_steps=5, snap=0.002):
+        self.tick = 1.0 / rate
+        self.max_steps = max_steps
+        # Frames this close to one tick (seconds) count as exactly one, so the
+        # 16/17 ms jitter of the frame limiter doesn't turn into the odd
+        # doubled or skipped tick.
+        self.snap = snap
+        self.accumulator = 0.0
+        self.dropped = 0  # ticks given up on, for the curious
+
+    def reset(self):
+        # Forget the time so far (e.g. after a long pause/load).
+        self.accumulator = 0.0
+
+    def advance(self, dt):
+        # Ticks to run for a frame that took dt seconds.
+        if abs(dt - self.tick) < self.snap:
+            dt = self.tick
+        self.accumulator += dt
+        steps = int(self.accumulator / self.tick)
+        self.accumulator -= steps * self.tick
+        if steps > self.max_steps:
+            self.dropped += steps - self.max_steps
+            steps = self.max_steps
+        return steps
+
+    @property
+    def alpha(self):
+        return min(self.accumulator / self.tick, 1.0)
@@ -1,16 +1,39 @@
 #!/usr/bin/env python3
 import os
 import argparse
+import hashlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image, ImageSequence
 
+# Bump this when the way frames are written changes, so batch mode rebuilds everything.
+UNFURL_VERSION = 2
+CACHE_NAME = ".unfurl_cache.json"
+# Sidecar next to the frames: where each trimmed frame sat in the full GIF frame.
+TRIM_INDEX = "frames.json"
 
-def unfurl_gif(gif_path, character, animation, target_dir, flip=False):
+
+def unfurl_gif(
+    gif_path,
+    character,
+    animation,
+    target_dir,
+    flip=False,
+    verbose=True,
+    trim=True,
+    offsets=None,
+):
     """
     Extracts frames from a GIF and saves them as PNG files in the target directory.
     Filenames follow the convention:
         <character>_<animation>_<frame index>.png
 
     If flip is True, each frame is flipped horizontally before saving.
+    If trim is True, each frame is cropped to its opaque bounding box (most of a
+    GIF frame is transparent padding). Where the crop sat goes into offsets, if
+    given, as name -> [x, y, full width, full height] – see update_trim_index().
+    Returns the number of frames written (0 if the GIF couldn't be read).
     """
     # Ensure the target directory exists
     os.makedirs(target_dir, exist_ok=True)
@@ -25,38 +48,234 @@ def unfurl_gif(gif_path, character, animation, target_dir, flip=False):
                 if flip:
                     frame_rgba = frame_rgba.transpose(Image.FLIP_LEFT_RIGHT)
                 # Define the output filename and full path
-                frame_filename = f"{character}_{animation}_{frame_index}.png"
+                frame_name = f"{character}_{animation}_{frame_index}"
+                frame_filename = f"{frame_name}.png"
+                if trim:
+                    frame_rgba, offset = trim_frame(frame_rgba)
+                    if offsets is not None:
+                        offsets[frame_name] = offset
                 frame_path = os.path.join(target_dir, frame_filename)
                 # Save the frame as PNG
                 frame_rgba.save(frame_path, format="PNG")
-                print(f"Saved frame {frame_index} to {frame_path}")
+                if verbose:
+                    print(f"Saved frame {frame_index} to {frame_path}")
                 frame_index += 1
 
             if frame_index == 0:
                 print("No frames found in the GIF.")
-            else:
+            elif verbose:
                 print(f"Extracted {frame_index} frames successfully.")
+            return frame_index
 
     except Exception as e:
         print(f"Error processing {gif_path}: {e}")
+        return 0
+
+
+def trim_frame(frame_rgba):
+    """
+    Crops an RGBA frame to its opaque pixels. Returns the cropped image and
+    [x, y, full width, full height]: where the crop sat in the original.
+    """
+    full_w, full_h = frame_rgba.size
+    # a fully transparent frame keeps a single pixel
+    box = frame_rgba.getchannel("A").getbbox() or (0, 0, 1, 1)
+    return frame_rgba.crop(box), [box[0], box[1], full_w, full_h]
+
+
+def remove_stale_frames(character, animation, target_dir, frame_count):
+    """
+    Deletes <character>_<animation>_<n>.png for n >= frame_count, so a GIF that
+    lost frames doesn't leave old ones behind for the game to pick up.
+    """
+    prefix = f"{character}_{animation}_"
+    for filename in os.listdir(target_dir):
+        name, ext = os.path.splitext(filename)
+        if ext == ".png" and name.startswith(prefix):
+            index = name[len(prefix):]
+            if index.isdigit() and int(index) >= frame_count:
+                os.remove(os.path.join(target_dir, filename))
+
+
+def read_trim_index(target_dir):
+    try:
+        with open(os.path.join(target_dir, TRIM_INDEX)) as f:
+            return json.load(f)["frames"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def write_trim_index(target_dir, frames):
+    with open(os.path.join(target_dir, TRIM_INDEX), "w") as f:
+        json.dump({"frames": dict(sorted(frames.items()))}, f, indent=1)
+
+
+def update_trim_index(character, animation, target_dir, offsets):
+    """
+    Replaces the <character>_<animation>_<n> entries of the trim index in
+    target_dir with offsets (empty for untrimmed frames, which need none).
+    """
+    prefix = f"{character}_{animation}_"
+    frames = {
+        name: offset
+        for name, offset in read_trim_index(target_dir).items()
+        if not (name.startswith(prefix) and name[len(prefix):].isdigit())
+    }
+    frames.update(offsets)
+    write_trim_index(target_dir, frames)
+
+
+def load_manifest(manifest_path):
+    """
+    Reads a batch manifest: {"target": dir, "jobs": [{"gif", "character",
+    "animation", optional "flip", optional "trim", optional "target"}, ...]}.
+    Relative paths are resolved against the manifest's own directory. Frames
+    are trimmed unless a job says "trim": false.
+    """
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    default_target = manifest.get("target", ".")
+    jobs = []
+    for entry in manifest["jobs"]:
+        jobs.append(
+            {
+                "gif": os.path.join(base, entry["gif"]),
+                "character": entry["character"],
+                "animation": entry["animation"],
+                "flip": bool(entry.get("flip", False)),
+                "trim": bool(entry.get("trim", True)),
+                "target": os.path.join(base, entry.get("target", default_target)),
+            }
+        )
+    return jobs
+
+
+def job_key(job):
+    return f"{os.path.abspath(job['target'])}::{job['character']}_{job['animation']}"
+
+
+def job_fingerprint(job):
+    """
+    Hash of everything that decides a job's output: the GIF's bytes, the flip
+    and trim flags and the tool version. Same fingerprint -> same frames.
+    """
+    digest = hashlib.sha256()
+    with open(job["gif"], "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    digest.update(f"|flip={job['flip']}|trim={job['trim']}|v={UNFURL_VERSION}".encode())
+    return digest.hexdigest()
+
+
+def outputs_present(job, frame_count):
+    # Every frame on disk – and in the trim index, for a trimmed job.
+    names = [f"{job['character']}_{job['animation']}_{i}" for i in range(frame_count)]
+    trimmed = read_trim_index(job["target"]) if job["trim"] else {}
+    return frame_count > 0 and all(
+        os.path.exists(os.path.join(job["target"], f"{name}.png"))
+        and (not job["trim"] or name in trimmed)
+        for name in names
+    )
+
+
+def _run_job(job):
+    # Runs in a worker process.
+    start = time.perf_counter()
+    offsets = {}
+    frames = unfurl_gif(
+        job["gif"],
+        job["character"],
+        job["animation"],
+        job["target"],
+        flip=job["flip"],
+        verbose=False,
+        trim=job["trim"],
+        offsets=offsets,
+    )
+    if frames:
+        remove_stale_frames(job["character"], job["animation"], job["target"], frames)
+    # The index is shared by every job in the directory, so the parent writes it.
+    return frames, offsets, time.perf_counter() - start
+
+
+def unfurl_batch(manifest_path, workers=None, force=False):
+    """
+    Unfurls every job in the manifest across a process pool. Jobs whose GIF
+    content (and flip flag) hasn't changed since the last run, and whose frames
+    are all still on disk, are skipped. The fingerprints live in a cache file
+    next to the manifest. Prints a per-job timing report and returns it as a list
+    of (job, status, frames, seconds).
+    """
+    jobs = load_manifest(manifest_path)
+    cache_path = os.path.join(os.path.dirname(os.path.abspath(manifest_path)), CACHE_NAME)
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    start = time.perf_counter()
+    report = []
+    todo = []
+    for job in jobs:
+        hash_start = time.perf_counter()
+        fingerprint = job_fingerprint(job)
+        cached = cache.get(job_key(job))
+        if (
+            not force
+            and cached
+            and cached["fingerprint"] == fingerprint
+            and outputs_present(job, cached["frames"])
+        ):
+            report.append((job, "skipped", cached["frames"], time.perf_counter() - hash_start))
+        else:
+            todo.append((job, fingerprint))
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(_run_job, [job for job, _ in todo])
+            for (job, fingerprint), (frames, offsets, seconds) in zip(todo, results):
+                if frames:
+                    update_trim_index(job["character"], job["animation"], job["target"], offsets)
+                    cache[job_key(job)] = {"fingerprint": fingerprint, "frames": frames}
+                    report.append((job, "built", frames, seconds))
+                else:
+                    cache.pop(job_key(job), None)
+                    report.append((job, "failed", 0, seconds))
+
+    with open(cache_path, "w") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+
+    for job, status, frames, seconds in report:
+        print(
+            f"{status:<8} {job['character']}_{job['animation']:<16} "
+            f"{frames:>3} frames {seconds * 1000:8.1f} ms  {os.path.relpath(job['gif'])}"
+        )
+    built = sum(1 for r in report if r[1] == "built")
+    skipped = sum(1 for r in report if r[1] == "skipped")
+    failed = sum(1 for r in report if r[1] == "failed")
+    print(
+        f"{built} built, {skipped} up to date, {failed} failed "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    return report
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="Unfurl a GIF into separate PNG frames following the naming convention: <character>_<animation>_<frame index>.png"
     )
-    parser.add_argument("--gif", required=True, help="Path to the source GIF file.")
+    parser.add_argument("--gif", help="Path to the source GIF file.")
     parser.add_argument(
         "--character",
-        required=True,
         help="The character name to use as the image prefix.",
     )
     parser.add_argument(
-        "--animation", required=True, help="The animation name to use in the filename."
+        "--animation", help="The animation name to use in the filename."
     )
     parser.add_argument(
         "--target",
-        required=True,
         help="The target directory to save the extracted PNG frames.",
     )
     parser.add_argument(
@@ -64,9 +283,54 @@ def main():
         action="store_true",
         help="If set, flip the image horizontally before saving.",
     )
+    parser.add_argument(
+        "--no-trim",
+        action="store_true",
+        help="Keep the full GIF frame instead of cropping to the opaque pixels.",
+    )
+    parser.add_argument(
+        "--manifest",
+        help="Batch mode: unfurl every GIF listed in this JSON manifest (e.g. unfurl_manifest.json).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Batch mode: number of worker processes (default: one per CPU).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Batch mode: rebuild everything, even GIFs that haven't changed.",
+    )
     args = parser.parse_args()
 
-    unfurl_gif(args.gif, args.character, args.animation, args.target, flip=args.flip)
+    if args.manifest:
+        unfurl_batch(args.manifest, workers=args.jobs, force=args.force)
+        return
+    missing = [
+        flag
+        for flag in ("gif", "character", "animation", "target")
+        if getattr(args, flag) is None
+    ]
+    if missing:
+        parser.error(
+            "the following arguments are required without --manifest: "
+            + ", ".join(f"--{flag}" for flag in missing)
+        )
+
+    offsets = {}
+    frames = unfurl_gif(
+        args.gif,
+        args.character,
+        args.animation,
+        args.target,
+        flip=args.flip,
+        trim=not args.no_trim,
+        offsets=offsets,
+    )
+    if frames:
+        update_trim_index(args.character, args.animation, args.target, offsets)
 
 
 if __name__ == "__main__":